@@ -9,122 +9,125 @@ By choosing the functions below with the name for your intent, you can write you
  and it will run when the function is called by the hand gesture.
 """
 
+# Messages go through the interface's event log, so a slow console never holds up the camera
+from eventLog import log
+
 
 def r0_activated_tilted_right():
-    print('r0 activated and hand tilted right')
+    log('r0 activated and hand tilted right')
 
 
 def r0_deactivated_tilted_right():
-    print('r0 deactivated and hand tilted right')
+    log('r0 deactivated and hand tilted right')
 
 
 def r0_activated_tilted_left():
-    print('r0 activated and hand tilted left')
+    log('r0 activated and hand tilted left')
 
 
 def r0_deactivated_tilted_left():
-    print('r0 deactivated and hand tilted left')
+    log('r0 deactivated and hand tilted left')
 
 
 def r0_activated_without_tilt():
-    print('r0 activated and hand not tilted')
+    log('r0 activated and hand not tilted')
 
 
 def r0_deactivated_without_tilt():
-    print('r0 deactivated and hand not tilted')
+    log('r0 deactivated and hand not tilted')
 
 
 def r1_activated_tilted_right():
-    print('r1 activated and hand tilted right')
+    log('r1 activated and hand tilted right')
 
 
 def r1_deactivated_tilted_right():
-    print('r1 deactivated and hand tilted right')
+    log('r1 deactivated and hand tilted right')
 
 
 def r1_activated_tilted_left():
-    print('r1 activated and hand tilted left')
+    log('r1 activated and hand tilted left')
 
 
 def r1_deactivated_tilted_left():
-    print('r1 deactivated and hand tilted left')
+    log('r1 deactivated and hand tilted left')
 
 
 def r1_activated_without_tilt():
-    print('r1 activated and hand not tilted')
+    log('r1 activated and hand not tilted')
 
 
 def r1_deactivated_without_tilt():
-    print('r1 deactivated and hand not tilted')
+    log('r1 deactivated and hand not tilted')
 
 
 def r2_activated_tilted_right():
-    print('r2 activated and hand tilted right')
+    log('r2 activated and hand tilted right')
 
 
 def r2_deactivated_tilted_right():
-    print('r2 deactivated and hand tilted right')
+    log('r2 deactivated and hand tilted right')
 
 
 def r2_activated_tilted_left():
-    print('r2 activated and hand tilted left')
+    log('r2 activated and hand tilted left')
 
 
 def r2_deactivated_tilted_left():
-    print('r2 deactivated and hand tilted left')
+    log('r2 deactivated and hand tilted left')
 
 
 def r2_activated_without_tilt():
-    print('r2 activated and hand not tilted')
+    log('r2 activated and hand not tilted')
 
 
 def r2_deactivated_without_tilt():
-    print('r2 deactivated and hand not tilted')
+    log('r2 deactivated and hand not tilted')
 
 
 def r3_activated_tilted_right():
-    print('r3 activated and hand tilted right')
+    log('r3 activated and hand tilted right')
 
 
 def r3_deactivated_tilted_right():
-    print('r3 deactivated and hand tilted right')
+    log('r3 deactivated and hand tilted right')
 
 
 def r3_activated_tilted_left():
-    print('r3 activated and hand tilted left')
+    log('r3 activated and hand tilted left')
 
 
 def r3_deactivated_tilted_left():
-    print('r3 deactivated and hand tilted left')
+    log('r3 deactivated and hand tilted left')
 
 
 def r3_activated_without_tilt():
-    print('r3 activated and hand not tilted')
+    log('r3 activated and hand not tilted')
 
 
 def r3_deactivated_without_tilt():
-    print('r3 deactivated and hand not tilted')
+    log('r3 deactivated and hand not tilted')
 
 
 def r4_activated_tilted_right():
-    print('r4 activated and hand tilted right')
+    log('r4 activated and hand tilted right')
 
 
 def r4_deactivated_tilted_right():
-    print('r4 deactivated and hand tilted right')
+    log('r4 deactivated and hand tilted right')
 
 
 def r4_activated_tilted_left():
-    print('r4 activated and hand tilted left')
+    log('r4 activated and hand tilted left')
 
 
 def r4_deactivated_tilted_left():
-    print('r4 deactivated and hand tilted left')
+    log('r4 deactivated and hand tilted left')
 
 
 def r4_activated_without_tilt():
-    print('r4 activated and hand not tilted')
+    log('r4 activated and hand not tilted')
 
 
 def r4_deactivated_without_tilt():
-    print('r4 deactivated and hand not tilted')
+    log('r4 deactivated and hand not tilted')
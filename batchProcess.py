@@ -0,0 +1,257 @@
+"""
+Labels recorded gesture videos in parallel, one process per core.
+
+MediaPipe runs each model on a single graph, so one process cannot keep more than a core or two busy.
+This script splits the work into shards, either whole video files or time ranges of a long one,
+ and hands them to a pool of worker processes.
+Each worker opens its own landmark backend and its own GestureControlInterface, runs its shard the way
+ main.py --offline does, and records the landmarks of every frame to a trace.
+
+A time range shard starts reading a little before its range, --overlap seconds, so the model is already
+ tracking the hands when the range starts, and landmarks from that warm-up are thrown away.
+The gesture state, above all the mode, can depend on anything that happened earlier in the file,
+ so the events do not come from the workers: the traces of a file's shards are merged back in timestamp order
+ and the gesture logic, which is cheap next to the model, runs once over the whole file in this process.
+The events then carry the same mode and hand state as one long run over the same landmarks.
+A shard that fails, or whose trace stops short of the end of its range, stops the batch before anything is written,
+ since a hole in the landmarks would quietly change the events after it.
+
+Writes every event as JSON lines, with the video it came from, and optionally one landmark trace per video.
+
+Example:
+    python batchProcess.py archive/*.mp4 --events events.jsonl --trace-dir traces
+    python batchProcess.py long_session.mp4 --workers 8 --shard-seconds 60 --events events.jsonl
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import cv2  # pip install opencv-python
+import numpy as np  # pip install numpy
+
+from frameSources import VideoFileSource
+from landmarkBackends import BACKENDS
+from landmarkTrace import TraceRecorder, TraceReplay, replay_trace
+
+# How many frames short of the end of its range a shard's last frame may be before it counts as cut short
+END_TOLERANCE_FRAMES = 3
+
+
+# Part of a video to process, end is None for up to the end of the file
+class Shard:
+    __slots__ = ('index', 'path', 'start', 'end', 'overlap', 'trace_path')
+
+    def __init__(self, index, path, start=0.0, end=None, overlap=0.0, trace_path=None):
+        self.index = index
+        self.path = path
+        self.start = start
+        self.end = end
+        self.overlap = overlap
+        self.trace_path = trace_path
+
+
+# Length of a video in seconds and its frame rate, either None if the file does not say
+def video_timing(path):
+    cap = cv2.VideoCapture(path)
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    if fps <= 0:
+        return None, None
+    return (frames / fps if frames > 0 else None), fps
+
+
+# Readable time range of a shard
+def describe_shard(shard):
+    return f'{shard.path} {shard.start:.0f}s-{"end" if shard.end is None else f"{shard.end:.0f}s"}'
+
+
+# Split every video into shards of about shard_seconds each.
+# Without shard_seconds, a single video is split into one shard per worker and several videos are one shard each.
+def make_shards(paths, workers, shard_seconds=None, overlap=2.0):
+    shards = []
+    for path in paths:
+        duration = video_timing(path)[0]
+        seconds = shard_seconds
+        if seconds is None and len(paths) == 1 and duration:
+            seconds = duration / workers
+
+        if not seconds or not duration or duration <= seconds:
+            shards.append(Shard(len(shards), path))
+            continue
+
+        start = 0.0
+        while start < duration:
+            end = start + seconds
+            shards.append(Shard(len(shards), path, start, end if end < duration else None, overlap if start else 0.0))
+            start = end
+    return shards
+
+
+# Keep each worker to one OpenCV thread, the pool already has a process per core
+def init_worker():
+    cv2.setNumThreads(1)
+
+
+# Runs in a worker process, records the shard's landmarks to its trace, returns (shard index, frames read, seconds taken)
+def process_shard(shard, options):
+    from main import GestureControlInterface
+    from moduleLoader import read_config
+
+    # Read from the start of the warm-up, merge_traces() only keeps the shard's own range
+    source = VideoFileSource(shard.path, max(shard.start - shard.overlap, 0.0), shard.end)
+    interface = GestureControlInterface(modules=[None] * len(read_config()[0]), callback_workers=0, idle_rate=None,
+                                        preview='off', record=shard.trace_path, source=source, log_categories=(),
+                                        **options)
+
+    # The interface prints a report at the end, keep that out of the output
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        interface.run()
+    elapsed = time.perf_counter() - started
+    return shard.index, interface.frames_read, elapsed
+
+
+# Raise if a shard's trace stops short of the end of its range, or of the file when it has no end.
+# A worker that stopped early would otherwise leave a hole in the merged trace and its events.
+def check_shard(shard):
+    duration, fps = video_timing(shard.path)
+    end = shard.end if shard.end is not None else duration
+
+    # Nothing to check against when the file does not say how long it is
+    if end is None:
+        return
+
+    # The last frame starts up to a frame before the end, a little more is allowed for rounding in the file
+    timestamps = TraceReplay(shard.trace_path).records['timestamp']
+    last = float(timestamps[-1]) if len(timestamps) else None
+    if last is None or last < end - END_TOLERANCE_FRAMES / fps:
+        reached = 'no frames' if last is None else f'frames up to {last:.2f}s'
+        raise RuntimeError(f'{describe_shard(shard)} only has {reached} of a range ending at {end:.2f}s')
+
+
+# Join the traces of one video's shards into one trace, leaving out each shard's warm-up
+def merge_traces(shards, path):
+    with TraceRecorder(path) as recorder:
+        for shard in sorted(shards, key=lambda shard: shard.start):
+            records = TraceReplay(shard.trace_path).records
+            records = records[records['timestamp'] >= shard.start]
+
+            # Number the frames of the whole video again
+            records = records.copy()
+            records['sequence'] = np.arange(recorder.frames + 1, recorder.frames + 1 + len(records))
+            recorder.write_records(records)
+    return recorder.frames
+
+
+# Run the gesture logic over a whole video's merged trace, returns its events as dicts in timestamp order
+def label_trace(path, source):
+    from main import GestureControlInterface
+    from moduleLoader import read_config
+
+    interface = GestureControlInterface(modules=[None] * len(read_config()[0]), callback_workers=0, idle_rate=None,
+                                        preview='off', log_categories=())
+    events = []
+    interface.events.subscribe(events.append, inline=True)
+    replay_trace(interface, TraceReplay(path))
+
+    events = [event.as_dict() for event in events]
+    for event in events:
+        event['source'] = source
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Label recorded gesture videos on every core.')
+    parser.add_argument('videos', nargs='+', help='video files to process')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: number of cores)')
+    parser.add_argument('--shard-seconds', type=float, default=None,
+                        help='split videos into time ranges of this many seconds '
+                             '(default: a single video is split evenly over the workers)')
+    parser.add_argument('--overlap', type=float, default=2.0,
+                        help='seconds read before each time range to warm up the gesture state (default: 2.0)')
+    parser.add_argument('--events', metavar='FILE', help='write every event as JSON lines in timestamp order')
+    parser.add_argument('--trace-dir', metavar='DIR', help='write one landmark trace per video to this directory')
+    parser.add_argument('--backend', default='holistic', choices=list(BACKENDS),
+                        help="landmark model, 'hands' is cheaper (default: holistic)")
+    parser.add_argument('--inference-width', type=int, default=640,
+                        help='width frames are shrunk to before inference (default: 640)')
+    parser.add_argument('--hand-roi', action='store_true',
+                        help='only send the area around tracked hands to the model, needs --backend hands')
+    args = parser.parse_args()
+
+    if args.hand_roi and not BACKENDS[args.backend].supports_hand_roi:
+        parser.error(f"--hand-roi does not work with the {args.backend!r} backend, use --backend hands")
+    for path in args.videos:
+        if not os.path.isfile(path):
+            parser.error(f'{path} is not a video file')
+
+    options = {'backend': args.backend, 'inference_width': args.inference_width, 'hand_roi': args.hand_roi}
+    shards = make_shards(args.videos, args.workers, args.shard_seconds, args.overlap)
+
+    with tempfile.TemporaryDirectory() as shard_dir:
+        # Every shard records its landmarks, the events come from them
+        if args.trace_dir:
+            os.makedirs(args.trace_dir, exist_ok=True)
+        for shard in shards:
+            shard.trace_path = os.path.join(shard_dir, f'{shard.index}.trace')
+
+        print(f'processing {len(args.videos)} videos as {len(shards)} shards on {args.workers} workers')
+        started = time.perf_counter()
+        frames = 0
+        busy = 0.0
+
+        # Spawned workers start clean instead of inheriting this process's threads and OpenCV state
+        with concurrent.futures.ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=init_worker) as pool:
+            futures = {pool.submit(process_shard, shard, options): shard for shard in shards}
+            for future in concurrent.futures.as_completed(futures):
+                # A failed shard would leave a hole in its video, so the batch stops without writing anything
+                try:
+                    index, shard_frames, elapsed = future.result()
+                except Exception as error:
+                    for pending in futures:
+                        pending.cancel()
+                    raise RuntimeError(f'{describe_shard(futures[future])} failed: {error}') from error
+                frames += shard_frames
+                busy += elapsed
+                shard = shards[index]
+                print(f'{describe_shard(shard)}: {shard_frames} frames in {elapsed:.1f}s')
+
+        elapsed = time.perf_counter() - started
+        print(f'{frames} frames in {elapsed:.1f}s, {frames / elapsed:.1f} frames/s, '
+              f'{busy / elapsed:.1f}x the speed of one worker')
+
+        for shard in shards:
+            check_shard(shard)
+
+        # One trace per video, kept in the trace directory if there is one
+        trace_paths = []
+        for index, path in enumerate(args.videos):
+            if args.trace_dir:
+                trace_path = os.path.join(args.trace_dir, os.path.splitext(os.path.basename(path))[0] + '.trace')
+            else:
+                trace_path = os.path.join(shard_dir, f'video{index}.trace')
+            count = merge_traces([shard for shard in shards if shard.path == path], trace_path)
+            trace_paths.append(trace_path)
+            if args.trace_dir:
+                print(f'wrote {count} frames to {trace_path}')
+
+        # Events of each video in timestamp order, videos in the order they were given
+        if args.events:
+            with open(args.events, 'w') as file:
+                for path, trace_path in zip(args.videos, trace_paths):
+                    for event in label_trace(trace_path, path):
+                        file.write(json.dumps(event) + '\n')
+            print(f'wrote events to {args.events}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Compares how long each landmark backend takes per frame on this machine.
+
+Frames are read from the webcam or a video file first and converted to RGB,
+ then every backend runs on the same frames, so only the model's own time is measured.
+It also shows how often each backend found each hand, to check the cheaper backend still sees them.
+
+With --hand-roi, Hands also runs the way --hand-roi runs it in main.py, as 'hands-roi':
+ each frame is cropped around the hands found in the frame before and shrunk to --inference-width.
+Its time includes that cropping and shrinking, which the other rows do not pay, and how many frames
+ were cropped and how often tracking had to restart because the crop box moved.
+
+Example:
+    python benchmarkBackends.py --source myRecording.mp4 --frames 300
+    python benchmarkBackends.py --source myRecording.mp4 --backends hands --hand-roi
+"""
+
+import argparse
+import time
+
+import cv2  # pip install opencv-python
+import numpy as np  # pip install numpy
+
+from landmarkBackends import BACKENDS, create_backend
+from preprocessing import FramePreprocessor
+
+
+# Read up to count frames from a camera index or a video file, as they come from the camera
+def read_frames(source, count):
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    frames = []
+    while cap.isOpened() and len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+# Time process on every image after running it on the first warmup ones, process returns HandResults
+def time_frames(name, process, images, warmup):
+    # Let the model settle before timing it
+    for image in images[:warmup]:
+        process(image)
+
+    times = []
+    left_found = right_found = 0
+    for image in images:
+        started = time.perf_counter()
+        results = process(image)
+        times.append(time.perf_counter() - started)
+
+        left_found += results.left_hand_landmarks is not None
+        right_found += results.right_hand_landmarks is not None
+
+    times = np.array(times) * 1000
+    return {
+        'backend': name,
+        'mean': times.mean(),
+        'p50': np.percentile(times, 50),
+        'p95': np.percentile(times, 95),
+        'fps': 1000 / times.mean(),
+        'left': left_found / len(images),
+        'right': right_found / len(images),
+    }
+
+
+def benchmark(name, images, warmup):
+    with create_backend(name, min_detection_confidence=0.9, min_tracking_confidence=0.9) as backend:
+        return time_frames(name, backend.process, images, warmup)
+
+
+# Hands on crops around the hands, frames are the camera's BGR frames since cropping is part of what is timed
+def benchmark_hand_roi(frames, warmup, inference_width):
+    preprocessor = FramePreprocessor(inference_width, hand_roi=True)
+    with create_backend('hands', min_detection_confidence=0.9, min_tracking_confidence=0.9,
+                        hand_roi=True) as backend:
+        def process(frame):
+            image, crop = preprocessor.prepare(frame)
+            results = backend.process(image, crop)
+            preprocessor.restore(results, crop)
+            preprocessor.track(results)
+            return results
+
+        result = time_frames('hands-roi', process, frames, warmup)
+        result['cropped'] = preprocessor.cropped_frames / (preprocessor.cropped_frames + preprocessor.full_frames)
+        result['restarts'] = backend.restarts
+    return result
+
+
+def print_row(result):
+    print(f'{result["backend"]:<10}{result["mean"]:>10.2f}{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+          f'{result["fps"]:>8.1f}{result["left"]:>8.0%}{result["right"]:>8.0%}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare landmark backends per frame.')
+    parser.add_argument('--source', default='0', help='camera index or video file (default: 0)')
+    parser.add_argument('--frames', type=int, default=200, help='frames to time (default: 200)')
+    parser.add_argument('--warmup', type=int, default=10, help='frames run before timing (default: 10)')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--hand-roi', action='store_true', help='also time Hands on crops around the hands')
+    parser.add_argument('--inference-width', type=int, default=640,
+                        help='width hand ROI crops are shrunk to (default: 640)')
+    args = parser.parse_args()
+
+    frames = read_frames(args.source, args.frames)
+    if not frames:
+        parser.error(f'could not read any frames from {args.source}')
+    images = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+
+    height, width = images[0].shape[:2]
+    print(f'{len(images)} frames of {width}x{height}')
+    print(f'{"backend":<10}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"fps":>8}{"left":>8}{"right":>8}')
+    for name in args.backends:
+        result = benchmark(name, images, args.warmup)
+        print_row(result)
+
+    if args.hand_roi:
+        result = benchmark_hand_roi(frames, args.warmup, args.inference_width)
+        print_row(result)
+        print(f'hands-roi cropped {result["cropped"]:.0%} of frames and restarted tracking {result["restarts"]} times')
+
+
+if __name__ == '__main__':
+    main()
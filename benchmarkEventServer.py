@@ -0,0 +1,109 @@
+"""
+Measures how many gesture events per second the event server gets to its clients, and how long they take.
+
+Starts an event server on a temporary socket, connects --clients client processes to it and publishes
+ --events events on an event bus, as fast as possible or at --rate events per second.
+Every event is stamped with time.perf_counter() when it is published, and each client checks the clock
+ again when it unpacks the event, which gives the fan-out latency from publish to client.
+--slow-clients adds clients that connect and never read, to show they do not slow down the others.
+
+Example:
+    python benchmarkEventServer.py --clients 4 --events 200000
+    python benchmarkEventServer.py --clients 4 --rate 1000 --slow-clients 2
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+
+from eventClient import EventClient
+from eventServer import POLICIES, EventServer
+from gestureEvents import EventBus, GestureEvent
+from latencyStats import LatencyHistogram
+
+
+# Runs in a client process, sends back (events received, seconds from first to last, latency stats)
+def run_client(path, results):
+    latency = LatencyHistogram()
+    received = 0
+    first = last = None
+
+    with EventClient(path) as client:
+        for event in client:
+            now = time.perf_counter()
+            latency.record(now - event.timestamp)
+            received += 1
+            if first is None:
+                first = now
+            last = now
+
+    results.put((received, (last - first) if received > 1 else 0.0, latency.stats()))
+
+
+# Publish events like a stream of right hand gestures
+def publish(bus, count, rate):
+    started = time.perf_counter()
+    for index in range(count):
+        if rate:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        bus.publish(GestureEvent(time.perf_counter(), 'gesture', 'right', index % 5, 'without_tilt',
+                                 'activated' if index % 2 == 0 else 'deactivated', 0))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the gesture event server.')
+    parser.add_argument('--clients', type=int, default=4, help='reading clients (default: 4)')
+    parser.add_argument('--slow-clients', type=int, default=0, help='clients that never read (default: 0)')
+    parser.add_argument('--events', type=int, default=100000, help='events to publish (default: 100000)')
+    parser.add_argument('--rate', type=float, default=None, help='events per second, default as fast as possible')
+    parser.add_argument('--policy', default='skip', choices=list(POLICIES),
+                        help='what happens to a client that falls behind (default: skip)')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'events.sock')
+    bus = EventBus()
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+
+    with EventServer(path, bus, policy=args.policy) as server:
+        processes = [context.Process(target=run_client, args=(path, results)) for _ in range(args.clients)]
+        for process in processes:
+            process.start()
+
+        # Clients that connect and then never read
+        slow = [socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) for _ in range(args.slow_clients)]
+        for sock in slow:
+            sock.connect(path)
+
+        # Wait for everyone to be connected before publishing
+        while server.stats()['clients'] < args.clients + args.slow_clients:
+            time.sleep(0.01)
+
+        elapsed = publish(bus, args.events, args.rate)
+        stats = server.stats()
+
+    # Closing the server sent everything left and disconnected the clients
+    clients = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    for sock in slow:
+        sock.close()
+
+    print(f'published {args.events} events in {elapsed:.2f}s, {args.events / elapsed:.0f} events/s, '
+          f'{stats["batches"]} batches')
+    print(f'{"client":<8}{"events":>10}{"events/s":>12}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for index, (received, seconds, latency) in enumerate(clients):
+        print(f'{index:<8}{received:>10}{received / seconds if seconds else 0:>12.0f}{latency["p50"] * 1000:>10.3f}'
+              f'{latency["p95"] * 1000:>10.3f}{latency["p99"] * 1000:>10.3f}{latency["max"] * 1000:>10.3f}')
+    if args.slow_clients:
+        print(f'slow clients: {stats["skipped_events"]} events skipped, {stats["dropped_clients"]} clients dropped')
+
+
+if __name__ == '__main__':
+    main()
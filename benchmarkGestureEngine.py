@@ -0,0 +1,256 @@
+"""
+Measures what the gesture logic costs per frame, without a camera, mediapipe or real modules.
+
+Synthetic scenarios build landmark sequences that fold and release every finger of the right hand
+ in every tilt, switch modes with the left hand and make hands appear and disappear,
+ so every trigger, tilt and edge is exercised. Recorded traces can be added with --trace.
+Each scenario runs through check_if_active with counting stub modules, module functions run inline
+ and the event log off, and the report shows:
+    ns/frame      time per frame, best of --repeat runs
+    calls/s       module functions called per second of gesture logic
+    calls         module functions called per run, this must not change unless the gesture rules change
+    alloc B/frame bytes allocated at the peak of a frame on average, measured in a separate tracemalloc run
+
+Save a baseline with --save-baseline and check against it with --baseline,
+ the run fails if any scenario got slower than the tolerance allows or fires a different number of calls.
+
+Example:
+    python benchmarkGestureEngine.py --save-baseline benchmarkBaseline.json
+    python benchmarkGestureEngine.py --baseline benchmarkBaseline.json --trace session.trace
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np  # pip install numpy
+
+from dispatchTable import EDGES, FINGERS
+from gestureRules import TILTS
+from handLandmarks import HandResults, NUM_LANDMARKS
+from landmarkTrace import TraceReplay
+from main import GestureControlInterface
+
+# Open right hand facing the screen, not tilted, in normalized image coordinates (y grows downwards)
+RIGHT_HAND = np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+RIGHT_HAND[:, :2] = [
+    (0.50, 0.85),                                              # wrist
+    (0.58, 0.78), (0.64, 0.72), (0.68, 0.66), (0.72, 0.61),    # thumb
+    (0.56, 0.55), (0.56, 0.47), (0.56, 0.41), (0.56, 0.36),    # index finger
+    (0.52, 0.53), (0.52, 0.45), (0.52, 0.39), (0.52, 0.34),    # middle finger
+    (0.48, 0.54), (0.48, 0.46), (0.48, 0.40), (0.48, 0.35),    # ring finger
+    (0.44, 0.57), (0.44, 0.49), (0.44, 0.43), (0.44, 0.38),    # pinky
+]
+
+# Wrist x for each tilt, tilting moves the wrist past the index or pinky base knuckle
+WRIST_X = {'tilted_right': 0.60, 'tilted_left': 0.40, 'without_tilt': 0.50}
+
+# Frames a finger is held folded and then released
+HOLD_FRAMES = 4
+
+
+# A hand with some fingers folded, the left hand is the right hand mirrored
+def make_hand(folded=(), tilt='without_tilt', left=False):
+    hand = RIGHT_HAND.copy()
+    hand[0, 0] = WRIST_X[tilt]
+
+    for finger in folded:
+        # Thumb tip and knuckle cross over the palm
+        if finger == 0:
+            hand[2:5, :2] = [(0.62, 0.70), (0.53, 0.66), (0.50, 0.64)]
+
+        # Finger tip bends down past its base knuckle
+        else:
+            base = 1 + 4 * finger
+            base_y = hand[base, 1]
+            hand[base + 1:base + 4, 1] = [base_y - 0.04, base_y + 0.01, base_y + 0.05]
+
+    if left:
+        hand[:, 0] = 1 - hand[:, 0]
+    return hand
+
+
+# Small noise that never crosses a trigger, so the scenario stays the same but values change every frame
+def jitter(frames, seed=0):
+    rng = np.random.default_rng(seed)
+    for results in frames:
+        for hand in (results.left_hand_landmarks, results.right_hand_landmarks):
+            if hand is not None:
+                hand += rng.normal(0, 0.001, hand.shape).astype(np.float32)
+    return frames
+
+
+# Fold and release every right hand finger in every tilt, while the left hand picks modes in left_modes
+def finger_sweep(left_modes=(None,)):
+    frames = []
+    for mode in left_modes:
+        for tilt in TILTS:
+            for finger in range(FINGERS):
+                for folded in ((finger,), ()):
+                    for _ in range(HOLD_FRAMES):
+                        left = make_hand(() if mode is None else (mode,), left=True)
+                        frames.append(HandResults(left, make_hand(folded, tilt)))
+
+            # Release the mode finger so the next one can be picked
+            for _ in range(HOLD_FRAMES):
+                frames.append(HandResults(make_hand(left=True), make_hand()))
+    return frames
+
+
+def scenario_frames(name, count):
+    if name == 'no_hands':
+        return [HandResults() for _ in range(count)]
+
+    if name == 'open_hands':
+        frames = [HandResults(make_hand(left=True), make_hand()) for _ in range(count)]
+
+    elif name == 'right_gestures':
+        frames = finger_sweep()
+
+    # Every mode the left hand can pick, l0 last so it is never held together with l3
+    elif name == 'mode_switching':
+        frames = finger_sweep((1, 2, 3, 4, 0))
+
+    # The right hand keeps leaving the frame while a finger is folded
+    elif name == 'hand_flicker':
+        frames = []
+        for index in range(count):
+            present = index % 8 < 5
+            folded = ((index // 8) % FINGERS,) if index % 16 < 8 else ()
+            frames.append(HandResults(make_hand(left=True), make_hand(folded) if present else None))
+
+    else:
+        raise ValueError(f'unknown scenario {name!r}')
+
+    # Repeat the sequence up to the frame count
+    frames = [frames[index % len(frames)] for index in range(count)]
+    return jitter([HandResults(None if results.left_hand_landmarks is None else results.left_hand_landmarks.copy(),
+                               None if results.right_hand_landmarks is None else results.right_hand_landmarks.copy())
+                   for results in frames])
+
+
+SCENARIOS = ('no_hands', 'open_hands', 'right_gestures', 'mode_switching', 'hand_flicker')
+
+
+# Stands in for a gesture module and counts every function called on it
+class CountingModule:
+    def __init__(self):
+        self.calls = 0
+        for finger in range(FINGERS):
+            for edge in EDGES:
+                for tilt in TILTS:
+                    setattr(self, f'r{finger}_{edge}_{tilt}', self.count)
+
+    def count(self):
+        self.calls += 1
+
+
+def new_interface():
+    modules = [CountingModule() for _ in range(FINGERS)]
+    return GestureControlInterface(modules=modules, callback_workers=0, log_categories=()), modules
+
+
+# Time one pass over the frames, returns (seconds, module functions called)
+def timed_run(frames):
+    interface, modules = new_interface()
+    check_if_active = interface.check_if_active
+
+    started = time.perf_counter_ns()
+    for results in frames:
+        check_if_active(results)
+    elapsed = time.perf_counter_ns() - started
+
+    return elapsed / 1e9, sum(module.calls for module in modules)
+
+
+# Average of the peak bytes allocated while handling each frame
+def allocations_per_frame(frames):
+    interface, _ = new_interface()
+    total = 0
+
+    tracemalloc.start()
+    for results in frames:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        interface.check_if_active(results)
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return total / len(frames)
+
+
+def benchmark(name, frames, repeat):
+    runs = [timed_run(frames) for _ in range(repeat)]
+    allocated = allocations_per_frame(frames)
+
+    best, calls = min(runs)
+    return {
+        'scenario': name,
+        'frames': len(frames),
+        'ns_per_frame': best * 1e9 / len(frames),
+        'calls_per_second': calls / best if best else 0.0,
+        'calls': calls,
+        'alloc_bytes_per_frame': allocated,
+    }
+
+
+# Scenarios that got slower than the tolerance allows or fire a different number of calls
+def regressions(results, baseline, tolerance):
+    failures = []
+    for result in results:
+        expected = baseline.get(result['scenario'])
+        if expected is None:
+            continue
+        if result['ns_per_frame'] > expected['ns_per_frame'] * (1 + tolerance):
+            failures.append(f'{result["scenario"]}: {result["ns_per_frame"]:.0f} ns/frame, '
+                            f'baseline {expected["ns_per_frame"]:.0f} ns/frame')
+        if result['frames'] == expected['frames'] and result['calls'] != expected['calls']:
+            failures.append(f'{result["scenario"]}: {result["calls"]} calls, baseline {expected["calls"]} calls')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the gesture logic per frame.')
+    parser.add_argument('--frames', type=int, default=3000, help='frames per synthetic scenario (default: 3000)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per scenario, best is kept (default: 5)')
+    parser.add_argument('--scenarios', nargs='*', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--trace', action='append', default=[], help='recorded trace to benchmark, can be repeated')
+    parser.add_argument('--baseline', help='baseline file to compare against')
+    parser.add_argument('--save-baseline', help='save the results as a baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='how much slower than the baseline is allowed (default: 0.25)')
+    args = parser.parse_args()
+
+    work = [(name, scenario_frames(name, args.frames)) for name in args.scenarios]
+    for path in args.trace:
+        trace = TraceReplay(path)
+        work.append((os.path.basename(path), [trace.results(index) for index in range(len(trace))]))
+
+    print(f'{"scenario":<24}{"frames":>8}{"ns/frame":>12}{"calls/s":>12}{"calls":>8}{"alloc B/frame":>15}')
+    results = []
+    for name, frames in work:
+        result = benchmark(name, frames, args.repeat)
+        results.append(result)
+        print(f'{name:<24}{result["frames"]:>8}{result["ns_per_frame"]:>12.0f}{result["calls_per_second"]:>12.0f}'
+              f'{result["calls"]:>8}{result["alloc_bytes_per_frame"]:>15.0f}')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({result['scenario']: result for result in results}, file, indent=2)
+        print(f'saved baseline to {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            failures = regressions(results, json.load(file), args.tolerance)
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        if failures:
+            sys.exit(1)
+        print('no regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
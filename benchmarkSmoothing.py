@@ -0,0 +1,161 @@
+"""
+Measures how many module calls landmark smoothing and debouncing save, by running the same frames with and
+ without them.
+
+Each recorded trace given with --trace, and two synthetic scenarios, go through the gesture logic on raw
+ landmarks, with the One Euro filter, with debouncing of --debounce-frames frames and with both,
+ and the report shows for each:
+    calls         module functions called
+    flickers      activations deactivated again within --flicker-frames frames, the pairs smoothing should remove
+    activations   gestures activated, which should stay about the same since smoothing must not eat real gestures
+    suppressed    edges debouncing held back
+    delay         mean frames an activation comes later than raw, for activations found in both runs
+
+The synthetic scenarios are:
+    finger_sweep  clean folds and releases of every finger in every tilt, nothing should be removed here
+    borderline    fingers held half folded, just past their triggers, with landmark noise that makes raw
+                  landmarks cross back over now and then
+
+Example:
+    python benchmarkSmoothing.py --trace session.trace
+    python benchmarkSmoothing.py --smooth-min-cutoff 0.1 --smooth-beta 40 --debounce-frames 3
+"""
+
+import argparse
+import os
+
+import numpy as np  # pip install numpy
+
+from benchmarkGestureEngine import CountingModule, finger_sweep, make_hand
+from dispatchTable import FINGERS
+from gestureRules import Debounce, TILTS
+from handLandmarks import HandResults, Y
+from landmarkTrace import TraceReplay
+from main import GestureControlInterface
+
+FRAME_RATE = 30.0
+
+
+# Fingers held half folded, with the tip just past the base knuckle and the top joint just past the middle one,
+#  so both the activation and the deactivation trigger sit offset from their threshold, about one noise step
+def borderline_frames(seed=0, noise=0.004, offset=0.006, hold=60, rest=30):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for tilt in TILTS:
+        for finger in range(1, FINGERS):
+            hand = make_hand(tilt=tilt)
+            base = 1 + 4 * finger
+            base_y = hand[base, 1]
+            hand[base + 1:base + 4, Y] = [base_y - 0.04, base_y - 0.04 + offset, base_y + offset]
+
+            for _ in range(hold):
+                frames.append((make_hand(left=True), hand + rng.normal(0, noise, hand.shape).astype(np.float32)))
+            for _ in range(rest):
+                open_hand = make_hand(tilt=tilt)
+                frames.append((make_hand(left=True), open_hand + rng.normal(0, noise, hand.shape).astype(np.float32)))
+
+    return [(index / FRAME_RATE, HandResults(left, right)) for index, (left, right) in enumerate(frames)]
+
+
+def sweep_frames():
+    return [(index / FRAME_RATE, HandResults(results.left_hand_landmarks, results.right_hand_landmarks))
+            for index, results in enumerate(finger_sweep((None, 1, 2, 3, 4, 0)))]
+
+
+def trace_frames(path):
+    trace = TraceReplay(path)
+    return list(trace)
+
+
+# Run frames through the gesture logic, returns (module calls, [(frame, gesture, activated)], edges suppressed)
+def run(frames, options):
+    modules = [CountingModule() for _ in range(FINGERS)]
+    interface = GestureControlInterface(modules=modules, callback_workers=0, log_categories=(), **options)
+
+    edges = []
+    frame = 0
+    interface.events.subscribe(lambda event: edges.append((frame, (event.hand, event.finger, event.tilt),
+                                                           event.edge == 'activated'))
+                               if event.kind == 'gesture' else None, inline=True)
+
+    for frame, (timestamp, results) in enumerate(frames):
+        interface.frame_timestamp = timestamp
+        interface.check_if_active(results)
+
+        # The exit gesture ends the run like it ends the camera loop
+        if interface.stop_requested.is_set():
+            break
+
+    suppressed = sum(interface.debounce_stats().values())
+    return sum(module.calls for module in modules), edges, suppressed
+
+
+# Activations deactivated again within flicker_frames frames
+def count_flickers(edges, flicker_frames):
+    activated_at = {}
+    flickers = 0
+    for frame, gesture, activated in edges:
+        if activated:
+            activated_at[gesture] = frame
+        elif gesture in activated_at and frame - activated_at.pop(gesture) <= flicker_frames:
+            flickers += 1
+    return flickers
+
+
+# Mean frames each activation of the raw run comes later in the filtered run, matched in order per gesture
+def activation_delay(raw_edges, filtered_edges):
+    filtered = {}
+    for frame, gesture, activated in filtered_edges:
+        if activated:
+            filtered.setdefault(gesture, []).append(frame)
+
+    delays = []
+    for frame, gesture, activated in raw_edges:
+        if activated and filtered.get(gesture):
+            later = [other for other in filtered[gesture] if other >= frame]
+            if later:
+                delays.append(later[0] - frame)
+                filtered[gesture].remove(later[0])
+    return sum(delays) / len(delays) if delays else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the module calls smoothing and debouncing remove.')
+    parser.add_argument('--trace', action='append', default=[], help='recorded trace to measure, can be repeated')
+    parser.add_argument('--flicker-frames', type=int, default=3,
+                        help='an activation deactivated within this many frames is a flicker (default: 3)')
+    parser.add_argument('--smooth-min-cutoff', type=float, default=0.05)
+    parser.add_argument('--smooth-beta', type=float, default=80.0)
+    parser.add_argument('--debounce-frames', type=int, default=3,
+                        help='frames in a row every gesture has to hold when debouncing (default: 3)')
+    parser.add_argument('--hand-loss-frames', type=int, default=3,
+                        help='frames in a row a hand has to be missing when debouncing (default: 3)')
+    args = parser.parse_args()
+
+    work = [('finger_sweep', sweep_frames()), ('borderline', borderline_frames())]
+    work += [(os.path.basename(path), trace_frames(path)) for path in args.trace]
+
+    smoothing = {'smoothing': True, 'smooth_min_cutoff': args.smooth_min_cutoff, 'smooth_beta': args.smooth_beta}
+    gesture_debounce = Debounce(args.debounce_frames, args.debounce_frames)
+    hand_debounce = Debounce(deactivate_frames=args.hand_loss_frames)
+    debouncing = {'debounce': {'left': gesture_debounce, 'right': gesture_debounce, 'left_hand': hand_debounce,
+                               'right_hand': hand_debounce}}
+    variants = (('smoothed', smoothing), ('debounced', debouncing), ('both', dict(smoothing, **debouncing)))
+
+    print(f'{"frames":<24}{"":>10}{"calls":>8}{"removed":>9}{"flickers":>10}{"activations":>13}{"suppressed":>12}'
+          f'{"delay":>7}')
+    for name, frames in work:
+        raw_calls, raw_edges, _ = run(frames, {})
+        print(f'{name:<24}{"raw":>10}{raw_calls:>8}{"":>9}{count_flickers(raw_edges, args.flicker_frames):>10}'
+              f'{sum(edge[2] for edge in raw_edges):>13}')
+
+        for label, options in variants:
+            calls, edges, suppressed = run(frames, options)
+            removed = (raw_calls - calls) / raw_calls if raw_calls else 0.0
+            print(f'{"":<24}{label:>10}{calls:>8}{removed:>9.0%}{count_flickers(edges, args.flicker_frames):>10}'
+                  f'{sum(edge[2] for edge in edges):>13}{suppressed:>12}'
+                  f'{activation_delay(raw_edges, edges):>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
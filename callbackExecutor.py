@@ -0,0 +1,212 @@
+"""
+Runs module functions on worker threads so slow module code never stalls the camera loop.
+
+Every callback is submitted with a key, and callbacks with the same key always go to the same worker,
+ which runs them in the order they were submitted.
+The gesture interface uses the gesture as the key, so an activation always runs before its deactivation.
+
+Each worker has a bounded queue. When a queue is full the policy decides what happens:
+ 'block' waits for the worker to catch up, 'drop_oldest' throws away the oldest waiting callback.
+Callbacks can be submitted with their edge, 'activated' or 'deactivated', and then drop_oldest never leaves
+ a module with half of a pair: an activation is dropped together with the deactivation of the same key,
+ whether that is already queued or submitted later, and a deactivation whose activation already ran
+ is never dropped. If only such deactivations are queued, submit waits as with 'block'.
+With 0 workers callbacks run right away on the calling thread.
+
+Each worker keeps latency histograms of how long callbacks waited in its queue and, for callbacks submitted
+ with the capture time of their frame, how long it took from capture until the callback started.
+"""
+
+import threading
+import time
+import traceback
+from collections import deque
+
+from latencyStats import LatencyHistogram
+
+# What to do when a worker's queue is full
+POLICIES = ('block', 'drop_oldest')
+
+
+class WorkerQueue:
+    def __init__(self):
+        self.items = deque()
+        self.condition = threading.Condition()
+
+        # Keys whose activation was dropped before their deactivation was submitted
+        self.cancelled = set()
+
+        # Counters, only changed while holding the condition
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        # Only written by the thread running this queue's callbacks
+        self.dispatch_latency = LatencyHistogram()
+        self.end_to_end_latency = LatencyHistogram()
+
+
+class CallbackExecutor:
+    def __init__(self, workers=1, max_queue=64, policy='block'):
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES}, not {policy!r}')
+        if max_queue < 1:
+            raise ValueError('max_queue must be at least 1')
+
+        self.max_queue = max_queue
+        self.policy = policy
+        self.running = True
+        self.queues = [WorkerQueue() for _ in range(workers)]
+
+        # Holds the latencies of callbacks run right away when there are no workers
+        self.inline = WorkerQueue()
+
+        # Start the workers
+        self.threads = [threading.Thread(target=self.work, args=(queue,), name=f'callback-worker-{index}',
+                                         daemon=True)
+                        for index, queue in enumerate(self.queues)]
+        for thread in self.threads:
+            thread.start()
+
+    # Queue a callback, callbacks with the same key run in the order they were submitted.
+    # captured_at is the time.perf_counter() the frame that led to the callback was captured at, if known.
+    # edge is 'activated' or 'deactivated' for one half of a pair of callbacks, see drop_oldest above.
+    def submit(self, key, callback, captured_at=None, edge=None):
+
+        # Without workers run the callback right here
+        if not self.queues:
+            if captured_at is not None:
+                self.inline.end_to_end_latency.record(time.perf_counter() - captured_at)
+            callback()
+            return
+
+        queue = self.queues[hash(key) % len(self.queues)]
+        with queue.condition:
+
+            if edge == 'activated':
+                queue.cancelled.discard(key)
+
+            while True:
+                # The activation of this deactivation was dropped, also while making room for it, so it goes too
+                if edge == 'deactivated' and key in queue.cancelled:
+                    queue.cancelled.discard(key)
+                    queue.dropped += 1
+                    return
+
+                # Make room if the queue is full
+                if len(queue.items) < self.max_queue or not self.running:
+                    break
+                if self.policy != 'drop_oldest' or not self.drop_oldest(queue):
+                    queue.condition.wait()
+
+            queue.items.append((callback, time.perf_counter(), captured_at, key, edge))
+            queue.submitted += 1
+            queue.max_depth = max(queue.max_depth, len(queue.items))
+            queue.condition.notify_all()
+
+    # Drop the oldest callback that can go without leaving half of a pair, returns False if none can
+    def drop_oldest(self, queue):
+        items = queue.items
+        for index, (_, _, _, key, edge) in enumerate(items):
+            # Its activation already ran
+            if edge == 'deactivated':
+                continue
+
+            del items[index]
+            queue.dropped += 1
+
+            # Take the activation's deactivation with it, now or once it is submitted
+            if edge == 'activated':
+                for later in range(index, len(items)):
+                    if items[later][3] == key and items[later][4] == 'deactivated':
+                        del items[later]
+                        queue.dropped += 1
+                        break
+                else:
+                    queue.cancelled.add(key)
+            return True
+        return False
+
+    def work(self, queue):
+        while True:
+            with queue.condition:
+
+                # Wait for a callback, and stop once shut down and the queue is empty
+                while not queue.items and self.running:
+                    queue.condition.wait()
+                if not queue.items:
+                    return
+
+                callback, queued_at, captured_at, _, _ = queue.items.popleft()
+
+                # Record how long the callback waited in the queue
+                now = time.perf_counter()
+                wait = now - queued_at
+                queue.total_wait += wait
+                queue.max_wait = max(queue.max_wait, wait)
+                queue.dispatch_latency.record(wait)
+                if captured_at is not None:
+                    queue.end_to_end_latency.record(now - captured_at)
+
+                # Let a blocked submit know there is room
+                queue.condition.notify_all()
+
+            # A failing module function must not kill the worker
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+                failed = True
+            else:
+                failed = False
+
+            with queue.condition:
+                if failed:
+                    queue.errors += 1
+                else:
+                    queue.completed += 1
+
+    # Number of callbacks waiting right now
+    def depth(self):
+        return sum(len(queue.items) for queue in self.queues)
+
+    def stats(self):
+        taken = sum(queue.completed + queue.errors for queue in self.queues)
+        total_wait = sum(queue.total_wait for queue in self.queues)
+        return {
+            'workers': len(self.queues),
+            'policy': self.policy,
+            'depth': self.depth(),
+            'max_depth': max((queue.max_depth for queue in self.queues), default=0),
+            'submitted': sum(queue.submitted for queue in self.queues),
+            'completed': sum(queue.completed for queue in self.queues),
+            'dropped': sum(queue.dropped for queue in self.queues),
+            'errors': sum(queue.errors for queue in self.queues),
+            'mean_wait': total_wait / taken if taken else 0.0,
+            'max_wait': max((queue.max_wait for queue in self.queues), default=0.0),
+        }
+
+    # Latency histograms of every worker added together
+    def latency(self):
+        queues = self.queues or [self.inline]
+        return {
+            'dispatch': queues[0].dispatch_latency.merge(*(queue.dispatch_latency for queue in queues[1:])),
+            'end_to_end': queues[0].end_to_end_latency.merge(*(queue.end_to_end_latency for queue in queues[1:])),
+        }
+
+    # Stop the workers, by default after every queued callback has run
+    def shutdown(self, wait=True):
+        self.running = False
+        for queue in self.queues:
+            with queue.condition:
+                if not wait:
+                    queue.dropped += len(queue.items)
+                    queue.items.clear()
+                queue.condition.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
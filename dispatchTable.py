@@ -0,0 +1,61 @@
+"""
+Table of module functions for every mode, finger, tilt and edge.
+
+The table is built once at startup from the list of modules, one row per mode.
+Every row holds the module's r-code functions at fixed slots,
+ so firing a gesture is one index lookup and one call instead of a chain of mode checks.
+Any number of modules can be given, and functions a module leaves out simply do nothing.
+A mode whose module is loaded later starts out as a row that does nothing and is filled in with set_module().
+"""
+
+from gestureRules import TILTS
+
+# Number of fingers on the right hand
+FINGERS = 5
+
+# Activation and deactivation, in slot order
+EDGES = ('activated', 'deactivated')
+
+
+# Used for any function a module does not have
+def do_nothing():
+    pass
+
+
+# Position of a finger, tilt and edge in a row, tilt and edge are given as their index
+def slot(finger, tilt, edge):
+    return (finger * len(TILTS) + tilt) * len(EDGES) + edge
+
+
+# Build the row of functions for one module
+def build_row(module):
+    row = [do_nothing] * (FINGERS * len(TILTS) * len(EDGES))
+
+    # A mode without a module does nothing
+    if module is None:
+        return row
+
+    for finger in range(FINGERS):
+        for tilt, tilt_name in enumerate(TILTS):
+            for edge, edge_name in enumerate(EDGES):
+                row[slot(finger, tilt, edge)] = getattr(module, f'r{finger}_{edge_name}_{tilt_name}', do_nothing)
+    return row
+
+
+class DispatchTable:
+    # Modes in pending have no row yet, until set_module() is called for them
+    def __init__(self, modules, pending=()):
+        self.pending = set(pending)
+        self.rows = [build_row(None if mode in self.pending else module) for mode, module in enumerate(modules)]
+
+    # Build the row of a mode from its module, the old row keeps working until the new one replaces it
+    def set_module(self, mode, module):
+        self.rows[mode] = build_row(module)
+        self.pending.discard(mode)
+
+    # Number of modes
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, mode, finger, tilt, edge):
+        return self.rows[mode][slot(finger, tilt, edge)]
@@ -0,0 +1,108 @@
+"""
+Receives gesture events from a running gesture interface's event server.
+
+Start the interface with an event socket, for example python main.py --serve /tmp/gestures.sock,
+ then in any other program:
+
+    from eventClient import EventClient
+
+    with EventClient('/tmp/gestures.sock') as client:
+        for event in client:
+            if event.kind == 'gesture' and event.edge == 'activated':
+                print(event.hand, event.finger, event.tilt)
+
+Events are GestureEvent objects, the same ones the interface publishes on its event bus.
+The wire format is described at the top of eventServer.py.
+
+A client that does not keep up can be skipped by the server, so some events never reach it,
+ for example the deactivation of a gesture it saw activated.
+Every event is numbered, so the client can tell: gap is how many events were missed right before
+ the batch read() returned, or while iterating right before the event just given, and skipped counts
+ every event missed so far.
+A client that tracks which gestures are active can start over when gap is not 0:
+
+    for event in client:
+        if client.gap:
+            active.clear()
+"""
+
+import socket
+
+from eventServer import BATCH, EVENT, HELLO, MAGIC, VERSION, unpack_event
+
+
+class EventClient:
+    def __init__(self, path, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.buffer = bytearray()
+
+        hello = self.read_exactly(HELLO.size)
+        if hello is None:
+            raise ConnectionError(f'{path} closed the connection before saying hello')
+        magic, version, event_size, sequence = HELLO.unpack(hello)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a gesture event server')
+        if version != VERSION or event_size != EVENT.size:
+            raise ValueError(f'{path} serves version {version} events, only version {VERSION} can be read')
+
+        # Number of the next event expected, events missed before the last batch read and in total
+        self.sequence = sequence
+        self.gap = 0
+        self.skipped = 0
+
+        self.sock.settimeout(timeout)
+
+    # Wait for size bytes, returns None if the server closed the connection
+    def read_exactly(self, size):
+        while len(self.buffer) < size:
+            data = self.sock.recv(max(65536, size - len(self.buffer)))
+            if not data:
+                return None
+            self.buffer += data
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    # The events of the next batch, an empty list once the server has closed the connection.
+    # Raises socket.timeout if a timeout was given and no batch came in time.
+    def read(self):
+        self.gap = 0
+        while True:
+            header = self.read_exactly(BATCH.size)
+            if header is None:
+                return []
+            count, sequence = BATCH.unpack(header)
+            data = self.read_exactly(count * EVENT.size)
+            if data is None:
+                return []
+
+            # The batch starts after the event expected if the server skipped this client
+            self.gap += sequence - self.sequence
+            self.skipped += sequence - self.sequence
+            self.sequence = sequence + count
+
+            # An empty batch only tells how far the events got, the server sends one before closing
+            if count:
+                return [unpack_event(data, offset) for offset in range(0, len(data), EVENT.size)]
+
+    # Go through every event until the server closes the connection
+    def __iter__(self):
+        while True:
+            events = self.read()
+            if not events:
+                return
+            for event in events:
+                yield event
+
+                # The gap was before the first event of the batch only
+                self.gap = 0
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,141 @@
+"""
+Logs hand, gesture and mode changes without ever making the camera loop wait for the console.
+
+record() only puts a tuple in an in-memory ring buffer, a background thread formats the events
+ and writes them out every few milliseconds, so a slow terminal or a full pipe holds up the writer thread
+ and never the frame loop.
+If the writer falls so far behind that the buffer fills up, the oldest events are dropped and counted.
+
+Every event has a category, and only the categories asked for are logged:
+    hand      a hand activated or deactivated
+    gesture   a left or right hand gesture activated or deactivated
+    mode      the left hand switched the mode
+    module    a message from a module function, sent with log()
+record() for a category that is off returns after one set lookup, and with every category off
+ no thread is started at all.
+
+Events are written as text lines like the messages the interface used to print, or as JSON lines
+ with timestamp, category, hand, finger, tilt, edge, mode and message.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+CATEGORIES = ('hand', 'gesture', 'mode', 'module')
+FORMATS = ('text', 'json')
+
+# Log that log() sends module messages to, the newest EventLog made
+active_log = None
+
+
+class EventLog:
+    # path None writes to stdout
+    def __init__(self, path=None, categories=CATEGORIES, log_format='text', capacity=4096, flush_interval=0.05):
+        global active_log
+
+        if log_format not in FORMATS:
+            raise ValueError(f'log_format must be one of {FORMATS}, not {log_format!r}')
+        unknown = set(categories) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f'unknown log categories {sorted(unknown)}, choose from {", ".join(CATEGORIES)}')
+
+        self.categories = frozenset(categories)
+        self.path = path
+        self.log_format = log_format
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+
+        # Appending to a deque is atomic, so any thread can record without a lock,
+        #  and a full deque throws away its oldest event by itself
+        self.buffer = deque(maxlen=capacity)
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+        self.stream = None
+        self.closed = threading.Event()
+        self.thread = None
+        if self.categories:
+            self.stream = sys.stdout if path is None else open(path, 'w')
+            self.thread = threading.Thread(target=self.write_loop, name='event-log-writer', daemon=True)
+            self.thread.start()
+
+        active_log = self
+
+    # Log an event, called from the frame loop and module workers
+    def record(self, category, timestamp, hand=None, finger=None, tilt=None, edge=None, mode=None, message=None):
+        if category not in self.categories:
+            return
+        if len(self.buffer) == self.capacity:
+            self.dropped += 1
+        self.buffer.append((timestamp, category, hand, finger, tilt, edge, mode, message))
+        self.recorded += 1
+
+    def write_loop(self):
+        while not self.closed.wait(self.flush_interval):
+            self.write_pending()
+        self.write_pending()
+
+    # Write every event in the buffer, only called by the writer thread or after it finished
+    def write_pending(self):
+        if not self.buffer:
+            return
+
+        lines = []
+        while self.buffer:
+            try:
+                event = self.buffer.popleft()
+            except IndexError:
+                break
+            lines.append(self.format(event))
+
+        self.stream.write(''.join(lines))
+        self.stream.flush()
+        self.written += len(lines)
+
+    def format(self, event):
+        timestamp, category, hand, finger, tilt, edge, mode, message = event
+
+        if self.log_format == 'json':
+            return json.dumps({'timestamp': timestamp, 'category': category, 'hand': hand, 'finger': finger,
+                               'tilt': tilt, 'edge': edge, 'mode': mode, 'message': message}) + '\n'
+
+        if category == 'hand':
+            return f'{hand} hand {edge}\n'
+        if category == 'gesture':
+            name = f'{hand[0]}{finger} {edge}'
+            return f'{name} {tilt.replace("_", " ")}\n' if tilt else f'{name}\n'
+        if category == 'mode':
+            return f'set mode to {mode}\n'
+        return f'{message}\n'
+
+    # Write what is left and stop the writer thread
+    def close(self):
+        global active_log
+
+        if active_log is self:
+            active_log = None
+        if self.thread is None:
+            return
+
+        self.closed.set()
+        self.thread.join()
+        self.thread = None
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+    def stats(self):
+        return {'recorded': self.recorded, 'written': self.written, 'dropped': self.dropped}
+
+
+# For module functions, logs a message through the interface's event log instead of printing it,
+#  and prints it when there is no event log, such as when a module is used on its own
+def log(message):
+    event_log = active_log
+    if event_log is None:
+        print(message)
+    else:
+        event_log.record('module', time.perf_counter(), message=message)
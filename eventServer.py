@@ -0,0 +1,281 @@
+"""
+Streams gesture events to other programs over a Unix domain socket.
+
+Apps that react to gestures connect to the socket instead of being imported into main.py as a module,
+ and any number of them can be connected at once. eventClient.py is the client side.
+
+Wire format, all little endian:
+
+    hello    sent once when a client connects, magic b'GNUIEVT\\0', then uint32 version and event size,
+             then uint64 sequence number of the first event the client can get
+    batch    uint16 count, uint64 sequence number of its first event, then count events,
+             a batch of 0 events is sent to every client before the server closes
+    event    float64  timestamp   frame time, as in GestureEvent.timestamp
+             uint8    kind        index in gestureEvents.KINDS
+             uint8    hand        0 left, 1 right
+             int8     finger      -1 if none
+             int8     tilt        index in gestureRules.TILTS, -1 if none
+             int8     edge        0 activated, 1 deactivated, -1 if none
+             uint8    mode
+
+The server subscribes inline to the interface's event bus, and all publishing costs the detection thread
+ is packing 14 bytes and appending them to a queue.
+The server's own thread wakes up, packs every event waiting into one batch and writes it to every client
+ with non-blocking sends, so many events cost one write per client.
+A client that does not read keeps its unsent data in a buffer of up to max_buffer bytes. Past that,
+ policy 'skip' leaves it out of new batches until it catches up and counts the skipped events,
+ and 'drop' disconnects it. Either way detection and the other clients never wait for it.
+
+Every event the server sends is numbered in the order it was published, starting from 0, and each batch says
+ the number of its first event, the events after it in the batch following on one by one.
+A client that was skipped finds a hole between the number it expected and the one the next batch starts at,
+ so it knows how many events it missed, such as the deactivation of a gesture whose activation it saw.
+The empty batch sent before closing carries the number after the last event, so a hole at the very end shows too.
+"""
+
+import os
+import selectors
+import socket
+import stat
+import struct
+import threading
+from collections import deque
+
+from gestureEvents import KINDS, GestureEvent
+from gestureRules import TILTS
+
+MAGIC = b'GNUIEVT\0'
+VERSION = 1
+HELLO = struct.Struct('<8sIIQ')
+BATCH = struct.Struct('<HQ')
+EVENT = struct.Struct('<dBBbbbB')
+
+HANDS = ('left', 'right')
+EDGES = ('activated', 'deactivated')
+POLICIES = ('skip', 'drop')
+
+# Most events in one batch, the count is a uint16
+MAX_BATCH = 0xFFFF
+
+
+def pack_event(event):
+    return EVENT.pack(event.timestamp, KINDS.index(event.kind), HANDS.index(event.hand),
+                      -1 if event.finger is None else event.finger,
+                      -1 if event.tilt is None else TILTS.index(event.tilt),
+                      -1 if event.edge is None else EDGES.index(event.edge),
+                      event.mode)
+
+
+def unpack_event(data, offset=0):
+    timestamp, kind, hand, finger, tilt, edge, mode = EVENT.unpack_from(data, offset)
+    return GestureEvent(timestamp, KINDS[kind], HANDS[hand], None if finger < 0 else finger,
+                        None if tilt < 0 else TILTS[tilt], None if edge < 0 else EDGES[edge], mode)
+
+
+class Client:
+    # sequence is the number the next event sent to any client will have
+    def __init__(self, sock, sequence):
+        self.sock = sock
+        self.buffer = bytearray(HELLO.pack(MAGIC, VERSION, EVENT.size, sequence))
+        self.sent_events = 0
+        self.skipped_events = 0
+
+
+class EventServer:
+    def __init__(self, path, bus, max_buffer=1 << 16, policy='skip'):
+        if policy not in POLICIES:
+            raise ValueError(f'policy must be one of {POLICIES}, not {policy!r}')
+        self.path = path
+        self.max_buffer = max_buffer
+        self.policy = policy
+
+        # A socket file left behind by a server that did not shut down is replaced
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen()
+        self.listener.setblocking(False)
+
+        # Writing a byte to wake_send wakes the server thread up when the first event of a batch arrives
+        self.wake_receive, self.wake_send = socket.socketpair()
+        self.wake_receive.setblocking(False)
+        self.wake_send.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.selector.register(self.wake_receive, selectors.EVENT_READ)
+
+        # Packed events waiting for the server thread, appended by the detection thread
+        self.pending = deque()
+        self.clients = {}
+
+        # Number of the next event to go into a batch, only used by the server thread
+        self.sequence = 0
+
+        # Counters
+        self.published = 0
+        self.batches = 0
+        self.connected = 0
+        self.dropped_clients = 0
+        self.skipped_events = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, name='event-server', daemon=True)
+        self.thread.start()
+        self.bus = bus
+        self.subscription = bus.subscribe(self.queue_event, inline=True, name='event-server')
+
+    # Called on the detection thread for every event
+    def queue_event(self, event):
+        self.pending.append(pack_event(event))
+        self.published += 1
+        if len(self.pending) == 1:
+            self.wake()
+
+    def wake(self):
+        try:
+            self.wake_send.send(b'\0')
+        except BlockingIOError:
+            pass
+
+    def serve(self):
+        while self.running:
+            for key, mask in self.selector.select(timeout=0.1):
+                if key.fileobj is self.listener:
+                    self.accept()
+                elif key.fileobj is self.wake_receive:
+                    try:
+                        self.wake_receive.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    client = key.data
+                    if mask & selectors.EVENT_READ and not self.receive(client):
+                        continue
+                    if mask & selectors.EVENT_WRITE:
+                        self.flush(client)
+
+            batch = self.take_batch()
+            if batch is not None:
+                self.send_batch(*batch)
+
+        # Send what is left before closing
+        batch = self.take_batch()
+        if batch is not None:
+            self.send_batch(*batch)
+        for client in list(self.clients.values()):
+            client.buffer += BATCH.pack(0, self.sequence)
+            self.flush(client)
+            self.disconnect(client)
+
+    def accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = Client(sock, self.sequence)
+        self.clients[sock] = client
+        self.connected += 1
+        self.selector.register(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+
+    # Clients send nothing, reading only tells when one disconnected, returns False if it did
+    def receive(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except BlockingIOError:
+            return True
+        except OSError:
+            data = b''
+        if not data:
+            self.disconnect(client)
+            return False
+        return True
+
+    # Every event waiting as one or more batches, and how many events there are
+    def take_batch(self):
+        if not self.pending:
+            return None
+
+        parts = []
+        count = 0
+        while self.pending:
+            events = []
+            while self.pending and len(events) < MAX_BATCH:
+                events.append(self.pending.popleft())
+            parts.append(BATCH.pack(len(events), self.sequence))
+            parts.extend(events)
+            count += len(events)
+            self.sequence += len(events)
+        self.batches += 1
+        return b''.join(parts), count
+
+    def send_batch(self, data, count):
+        for client in list(self.clients.values()):
+            if client.buffer and len(client.buffer) + len(data) > self.max_buffer:
+                if self.policy == 'drop':
+                    self.dropped_clients += 1
+                    self.disconnect(client)
+                else:
+                    client.skipped_events += count
+                    self.skipped_events += count
+                continue
+
+            client.buffer += data
+            client.sent_events += count
+            self.flush(client)
+
+    # Send as much of the client's buffer as the socket takes right now
+    def flush(self, client):
+        if client.sock not in self.clients:
+            return
+        try:
+            while client.buffer:
+                sent = client.sock.send(client.buffer)
+                del client.buffer[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self.disconnect(client)
+            return
+
+        # Only wait for the socket to be writable while there is something left to send
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.buffer else 0)
+        if self.selector.get_key(client.sock).events != events:
+            self.selector.modify(client.sock, events, client)
+
+    def disconnect(self, client):
+        if self.clients.pop(client.sock, None) is None:
+            return
+        self.selector.unregister(client.sock)
+        client.sock.close()
+
+    def stats(self):
+        return {
+            'clients': len(self.clients),
+            'connected': self.connected,
+            'published': self.published,
+            'batches': self.batches,
+            'dropped_clients': self.dropped_clients,
+            'skipped_events': self.skipped_events,
+        }
+
+    # Stop taking events, send what is left to the clients and remove the socket file
+    def close(self):
+        self.bus.unsubscribe(self.subscription)
+        self.running = False
+        self.wake()
+        self.thread.join()
+        self.selector.close()
+        self.listener.close()
+        self.wake_receive.close()
+        self.wake_send.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
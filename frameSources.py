@@ -0,0 +1,179 @@
+"""
+Frame sources for the gesture interface.
+
+Every source has read(), which returns (ret, frame, timestamp), plus isOpened() and release().
+Use open_source() with a camera index, a video file or a directory of images to get the right one.
+
+LatestFrameCapture reads the camera on its own thread and keeps only the newest frame.
+When inference is slower than the camera, older frames are replaced instead of piling up in the driver,
+ so gestures are always recognized on the freshest image.
+Every frame comes with the time it was captured, and the number of frames that were replaced is counted.
+
+VideoFileSource and ImageSequenceSource hand out every frame in order, as fast as they are asked for,
+ so a recording is processed as fast as inference allows instead of at the pace it was recorded.
+Their timestamps are the frame's position in the recording, in seconds.
+"""
+
+import os
+import threading
+import time
+
+import cv2  # pip install opencv-python
+
+# Files ImageSequenceSource reads from a directory
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+
+class LatestFrameCapture:
+    # Frames come at the camera's pace and are dropped if not read in time
+    live = True
+
+    def __init__(self, source=0):
+        self.cap = cv2.VideoCapture(source)
+
+        # Single slot holding the newest frame and when it was captured
+        self.condition = threading.Condition()
+        self.frame = None
+        self.captured_at = 0.0
+        self.sequence = 0
+        self.read_sequence = 0
+
+        # Counters
+        self.captured_frames = 0
+        self.dropped_frames = 0
+
+        # Start reading the camera
+        self.running = self.cap.isOpened()
+        self.thread = threading.Thread(target=self.capture, name='frame-capture', daemon=True)
+        if self.running:
+            self.thread.start()
+
+    def capture(self):
+        while self.running:
+            ret, frame = self.cap.read()
+            captured_at = time.perf_counter()
+
+            with self.condition:
+                # Stop if the camera stopped giving frames
+                if not ret:
+                    self.running = False
+                    self.condition.notify_all()
+                    break
+
+                # A frame that was never read is replaced by the new one
+                if self.sequence > self.read_sequence:
+                    self.dropped_frames += 1
+
+                self.frame = frame
+                self.captured_at = captured_at
+                self.sequence += 1
+                self.captured_frames += 1
+                self.condition.notify_all()
+
+    # True while the camera runs or a frame is still waiting to be read
+    def isOpened(self):
+        return self.running or self.sequence > self.read_sequence
+
+    # Wait for a frame newer than the last one read, returns (ret, frame, captured_at)
+    def read(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.sequence > self.read_sequence or not self.running, timeout)
+            if self.sequence == self.read_sequence:
+                return False, None, None
+
+            self.read_sequence = self.sequence
+            return True, self.frame, self.captured_at
+
+    def release(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        # The thread may be stuck in a camera read, so do not wait on it for long
+        if self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        self.cap.release()
+
+
+class VideoFileSource:
+    live = False
+
+    # Reads a video file from start seconds up to end seconds, or to its end if end is None
+    def __init__(self, path, start=0.0, end=None):
+        self.cap = cv2.VideoCapture(path)
+        self.end = end
+        if start:
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+
+        self.running = self.cap.isOpened()
+        self.captured_frames = 0
+        self.dropped_frames = 0
+
+    def isOpened(self):
+        return self.running
+
+    def read(self, timeout=None):
+        if not self.running:
+            return False, None, None
+
+        ret, frame = self.cap.read()
+
+        # Position of the frame just read
+        timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        if not ret or (self.end is not None and timestamp >= self.end):
+            self.running = False
+            return False, None, None
+
+        self.captured_frames += 1
+        return True, frame, timestamp
+
+    def release(self):
+        self.running = False
+        self.cap.release()
+
+
+class ImageSequenceSource:
+    live = False
+
+    # Reads the images of a directory in name order, as if they were frames fps apart
+    def __init__(self, directory, fps=30.0):
+        self.paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self.fps = fps
+        self.index = 0
+        self.captured_frames = 0
+        self.dropped_frames = 0
+
+    def isOpened(self):
+        return self.index < len(self.paths)
+
+    def read(self, timeout=None):
+        while self.index < len(self.paths):
+            index = self.index
+            self.index += 1
+
+            # Files that are not readable images are skipped
+            frame = cv2.imread(self.paths[index])
+            if frame is not None:
+                self.captured_frames += 1
+                return True, frame, index / self.fps
+            self.dropped_frames += 1
+
+        return False, None, None
+
+    def release(self):
+        self.index = len(self.paths)
+
+
+# Open a camera index (as an int or a string of digits), a video file or a directory of images.
+# A source that is already open, such as a VideoFileSource for part of a file, is used as it is.
+def open_source(source):
+    if hasattr(source, 'read'):
+        return source
+    if isinstance(source, int) or str(source).isdigit():
+        return LatestFrameCapture(int(source))
+    if os.path.isdir(source):
+        return ImageSequenceSource(source)
+    if os.path.isfile(source):
+        return VideoFileSource(source)
+    raise ValueError(f'{source!r} is not a camera index, video file or directory of images')
@@ -0,0 +1,91 @@
+"""
+Gesture events and the bus that hands them to any number of subscribers.
+
+The interface publishes a GestureEvent for every hand, gesture and mode change.
+Each subscriber gets the events through its own bounded queue and worker thread, a CallbackExecutor
+ with the 'drop_oldest' policy, so a slow subscriber only ever falls behind itself:
+ publishing never waits, and once a subscriber's queue is full its oldest events are dropped and counted.
+Subscribers that must see every event in order with the frame, such as tests, replays or batch runs,
+ can subscribe inline instead, and then run on the publishing thread.
+"""
+
+import functools
+import threading
+
+from callbackExecutor import CallbackExecutor
+
+# Kinds of events
+KINDS = ('hand', 'gesture', 'mode')
+
+
+# One hand, gesture or mode change.
+# hand is 'left' or 'right', finger is the gesture's or mode's finger, tilt is only set for right hand gestures,
+#  edge is 'activated' or 'deactivated' and mode is the mode after the change.
+class GestureEvent:
+    __slots__ = ('timestamp', 'kind', 'hand', 'finger', 'tilt', 'edge', 'mode')
+
+    def __init__(self, timestamp, kind, hand, finger=None, tilt=None, edge=None, mode=0):
+        self.timestamp = timestamp
+        self.kind = kind
+        self.hand = hand
+        self.finger = finger
+        self.tilt = tilt
+        self.edge = edge
+        self.mode = mode
+
+    def as_dict(self):
+        return {'timestamp': self.timestamp, 'type': self.kind, 'hand': self.hand, 'finger': self.finger,
+                'tilt': self.tilt, 'edge': self.edge, 'mode': self.mode}
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'GestureEvent({fields})'
+
+
+class Subscription:
+    def __init__(self, callback, max_queue, inline, name):
+        self.callback = callback
+        self.name = name or getattr(callback, '__name__', 'subscriber')
+        self.executor = CallbackExecutor(0 if inline else 1, max_queue, 'drop_oldest')
+
+    def deliver(self, event):
+        self.executor.submit(None, functools.partial(self.callback, event))
+
+    def stats(self):
+        stats = self.executor.stats()
+        stats['subscriber'] = self.name
+        return stats
+
+
+class EventBus:
+    def __init__(self):
+        # Replaced as a whole on every change, so publish() can go through it without a lock
+        self.subscriptions = ()
+        self.lock = threading.Lock()
+
+    # Call callback(event) for every event published from now on, returns the subscription to unsubscribe with
+    def subscribe(self, callback, max_queue=256, inline=False, name=None):
+        subscription = Subscription(callback, max_queue, inline, name)
+        with self.lock:
+            self.subscriptions = self.subscriptions + (subscription,)
+        return subscription
+
+    # Stop delivering to a subscription, events already queued for it are still delivered
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = tuple(other for other in self.subscriptions if other is not subscription)
+        subscription.executor.shutdown()
+
+    def publish(self, event):
+        for subscription in self.subscriptions:
+            subscription.deliver(event)
+
+    def stats(self):
+        return [subscription.stats() for subscription in self.subscriptions]
+
+    # Deliver what is queued and stop every subscriber's worker
+    def close(self):
+        with self.lock:
+            subscriptions, self.subscriptions = self.subscriptions, ()
+        for subscription in subscriptions:
+            subscription.executor.shutdown()
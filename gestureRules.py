@@ -0,0 +1,233 @@
+"""
+Gesture triggers written as data instead of if/elif blocks.
+
+Every trigger is a GestureRule with one condition that activates it and one that deactivates it.
+A condition compares one landmark coordinate against another,
+ for example "index finger's tip is below the index finger's base knuckle".
+Right hand rules also name the tilt they belong to, and only rules for the current tilt are checked.
+
+At startup the rules of a hand are compiled into index arrays,
+ so one vectorized comparison checks every activation, deactivation and tilt condition at once.
+Adding a gesture only means adding a row to a table below.
+Whether each trigger is activated is one integer per hand with bit i for rule i, and the conditions met are
+ packed into an integer the same way, so the triggers that changed come out of a few bitwise operations
+ and dispatch goes through only their set bits.
+Two integers are also all it takes to snapshot or compare the gesture state of both hands.
+
+Edges can be debounced: with a Debounce setting a rule only activates or deactivates once its condition
+ has held for a number of frames in a row and for a minimum time, so a condition that is met for a frame
+ or two and then not again never fires a pair of module calls.
+Settings are given per gesture name, or per hand as the default for all of that hand's gestures.
+The frames each pending edge has held are kept as integer counters in an array, and every edge that was
+ pending and then given up is counted as suppressed.
+"""
+
+from collections import namedtuple
+
+import numpy as np  # pip install numpy
+
+from handLandmarks import X, Y
+
+# Compare landmark[tip][axis] with landmark[reference][axis] using '>' or '<'.
+# The threshold is how far past the reference the tip has to be, in normalized image units.
+Condition = namedtuple('Condition', ['tip', 'reference', 'axis', 'comparison', 'threshold'], defaults=[0.0])
+
+# One trigger of one finger, tilt is None for triggers that ignore tilt
+GestureRule = namedtuple('GestureRule', ['name', 'hand', 'finger', 'tilt', 'activate', 'deactivate'])
+
+# Frames in a row and seconds an activation or deactivation condition has to hold before the edge happens.
+# The defaults, one frame and no hold time, act on the first frame like no debouncing at all.
+Debounce = namedtuple('Debounce', ['activate_frames', 'deactivate_frames', 'hold_time'], defaults=[1, 1, 0.0])
+
+# Every tilt a right hand trigger can belong to
+TILTS = ('tilted_right', 'tilted_left', 'without_tilt')
+
+# Tilt checks for the right hand in order, the first one met wins, if none is met the hand is not tilted
+RIGHT_HAND_TILTS = (
+    # Index finger's base knuckle is left of the wrist
+    ('tilted_right', Condition(5, 0, X, '<')),
+    # Pinky's base knuckle is right of the wrist
+    ('tilted_left', Condition(17, 0, X, '>')),
+)
+
+# Left hand triggers, each one selects the mode with its finger's number
+LEFT_HAND_RULES = (
+    # Thumb's knuckle segment is over palm, thumb's tip is not over palm
+    GestureRule('l0', 'left', 0, None, Condition(3, 5, X, '>'), Condition(4, 5, X, '<')),
+    # Index finger's tip is folded over palm, index finger's middle segment is angled away from palm
+    GestureRule('l1', 'left', 1, None, Condition(8, 5, Y, '>'), Condition(7, 6, Y, '<')),
+    # Middle finger's tip is folded over palm, middle finger's middle segment is angled away from palm
+    GestureRule('l2', 'left', 2, None, Condition(12, 9, Y, '>'), Condition(11, 10, Y, '<')),
+    # Ring finger's tip is folded over palm, ring finger's middle segment is angled away from palm
+    GestureRule('l3', 'left', 3, None, Condition(16, 13, Y, '>'), Condition(15, 14, Y, '<')),
+    # Pinky's tip is folded over palm, pinky's middle segment is angled away from palm
+    GestureRule('l4', 'left', 4, None, Condition(20, 17, Y, '>'), Condition(19, 18, Y, '<')),
+)
+
+# Right hand triggers, 5 fingers for each of the 3 tilts
+RIGHT_HAND_RULES = (
+    # Hand tilted right
+    # Thumb's tip crosses index finger's base knuckle, thumb's middle segment is angled away from palm
+    GestureRule('r0_tilted_right', 'right', 0, 'tilted_right', Condition(4, 5, X, '<'), Condition(3, 2, X, '>')),
+    GestureRule('r1_tilted_right', 'right', 1, 'tilted_right', Condition(8, 5, Y, '>'), Condition(7, 6, Y, '<')),
+    GestureRule('r2_tilted_right', 'right', 2, 'tilted_right', Condition(12, 9, Y, '>'), Condition(11, 10, Y, '<')),
+    GestureRule('r3_tilted_right', 'right', 3, 'tilted_right', Condition(16, 13, Y, '>'), Condition(15, 14, Y, '<')),
+    GestureRule('r4_tilted_right', 'right', 4, 'tilted_right', Condition(20, 17, Y, '>'), Condition(19, 18, Y, '<')),
+
+    # Hand tilted left
+    # Thumb's tip crosses the middle finger's base knuckle, thumb's tip is not over palm
+    GestureRule('r0_tilted_left', 'right', 0, 'tilted_left', Condition(4, 9, X, '<'), Condition(4, 5, X, '>')),
+    # Index finger's middle segment is checked against its base knuckle here
+    GestureRule('r1_tilted_left', 'right', 1, 'tilted_left', Condition(8, 5, Y, '>'), Condition(7, 5, Y, '<')),
+    GestureRule('r2_tilted_left', 'right', 2, 'tilted_left', Condition(12, 9, Y, '>'), Condition(11, 10, Y, '<')),
+    GestureRule('r3_tilted_left', 'right', 3, 'tilted_left', Condition(16, 13, Y, '>'), Condition(15, 14, Y, '<')),
+    GestureRule('r4_tilted_left', 'right', 4, 'tilted_left', Condition(20, 17, Y, '>'), Condition(19, 18, Y, '<')),
+
+    # Hand not tilted
+    # Thumb's knuckle is folded over palm, thumb's tip is not over palm
+    GestureRule('r0_without_tilt', 'right', 0, 'without_tilt', Condition(3, 5, X, '<'), Condition(4, 5, X, '>')),
+    GestureRule('r1_without_tilt', 'right', 1, 'without_tilt', Condition(8, 5, Y, '>'), Condition(7, 6, Y, '<')),
+    GestureRule('r2_without_tilt', 'right', 2, 'without_tilt', Condition(12, 9, Y, '>'), Condition(11, 10, Y, '<')),
+    # Ring finger and pinky deactivate once their tip is back above the base knuckle
+    GestureRule('r3_without_tilt', 'right', 3, 'without_tilt', Condition(16, 13, Y, '>'), Condition(16, 13, Y, '<')),
+    GestureRule('r4_without_tilt', 'right', 4, 'without_tilt', Condition(20, 17, Y, '>'), Condition(20, 17, Y, '<')),
+)
+
+
+class CompiledRules:
+    # debounce maps gesture names, or 'left' and 'right' for every gesture of a hand, to Debounce settings
+    def __init__(self, rules, tilts=(), debounce=None):
+        self.rules = tuple(rules)
+        self.names = [rule.name for rule in self.rules]
+        self.count = len(self.rules)
+
+        # Activation conditions first, then deactivation conditions, then tilt conditions
+        conditions = ([rule.activate for rule in self.rules] + [rule.deactivate for rule in self.rules]
+                      + [condition for _, condition in tilts])
+        for condition in conditions:
+            if condition.comparison not in ('>', '<'):
+                raise ValueError(f'unknown comparison {condition.comparison!r}')
+
+        # Index arrays so all conditions are read from the landmark array in one go
+        self.tips = np.array([condition.tip for condition in conditions], dtype=np.intp)
+        self.references = np.array([condition.reference for condition in conditions], dtype=np.intp)
+        self.axes = np.array([condition.axis for condition in conditions], dtype=np.intp)
+
+        # '<' is turned into '>' by flipping the sign of the difference
+        self.signs = np.array([1.0 if condition.comparison == '>' else -1.0 for condition in conditions],
+                              dtype=np.float32)
+        self.thresholds = np.array([condition.threshold for condition in conditions], dtype=np.float32)
+
+        # Tilt codes, checked in order, with -1 standing for rules that ignore tilt
+        self.tilt_codes = [TILTS.index(name) for name, _ in tilts]
+        self.default_tilt = TILTS.index('without_tilt') if tilts else -1
+        rule_tilts = np.array([TILTS.index(rule.tilt) if rule.tilt else -1 for rule in self.rules], dtype=np.intp)
+
+        # Which rules are listened to under each tilt, as a bitmask with bit i for rule i
+        self.full_mask = (1 << self.count) - 1
+        self.tilt_masks = {code: to_mask((rule_tilts == code) | (rule_tilts == -1)) for code in range(-1, len(TILTS))}
+
+        # Whether each trigger is currently activated, bit i for rule i
+        self.mask = 0
+        self.tilt = self.default_tilt
+
+        # Frames and seconds each rule's activation and deactivation has to hold
+        debounce = debounce or {}
+        settings = [debounce.get(rule.name, debounce.get(rule.hand, Debounce())) for rule in self.rules]
+        self.activate_frames = np.array([setting.activate_frames for setting in settings], dtype=np.int32)
+        self.deactivate_frames = np.array([setting.deactivate_frames for setting in settings], dtype=np.int32)
+        self.hold_times = np.array([setting.hold_time for setting in settings], dtype=np.float64)
+        self.debounced = bool((self.activate_frames > 1).any() or (self.deactivate_frames > 1).any()
+                              or (self.hold_times > 0).any())
+
+        # Frames each rule's pending edge has held so far, 0 when none is pending, and when it started
+        self.pending_frames = np.zeros(self.count, dtype=np.int32)
+        self.pending_since = np.zeros(self.count, dtype=np.float64)
+        self.suppressed = 0
+
+    # Whether each trigger is currently activated, as a bool array, for snapshots and comparisons
+    @property
+    def state(self):
+        return from_mask(self.mask, self.count)
+
+    def reset(self):
+        self.mask = 0
+        self.pending_frames[:] = 0
+
+    # Drop every pending edge but keep the state, for frames the rules are not evaluated on,
+    #  so the frames an edge has held are always in a row. Edges dropped this way count as suppressed.
+    def clear_pending(self):
+        if self.debounced:
+            self.suppressed += int(np.count_nonzero(self.pending_frames))
+            self.pending_frames[:] = 0
+
+    # Check every condition on this frame's landmarks and return a bitmask of the rules that changed,
+    #  after this their new state can be read from self.mask.
+    # timestamp is the frame's time in seconds, only needed for hold times.
+    def evaluate(self, landmarks, timestamp=0.0):
+        count = self.count
+
+        # Every activation, deactivation and tilt condition in one comparison, packed into one integer
+        met = to_mask(self.signs * (landmarks[self.tips, self.axes] - landmarks[self.references, self.axes])
+                      > self.thresholds)
+
+        # The first tilt condition met decides the tilt
+        self.tilt = self.default_tilt
+        tilt_met = met >> 2 * count
+        if tilt_met:
+            for offset, code in enumerate(self.tilt_codes):
+                if tilt_met >> offset & 1:
+                    self.tilt = code
+                    break
+
+        # Activate when the activation condition is met and the trigger was not active,
+        #  deactivate when the deactivation condition is met and the trigger was active
+        mask = self.mask
+        full = self.full_mask
+        changed = self.tilt_masks[self.tilt] & (((met & full) & ~mask) | ((met >> count & full) & mask))
+        if self.debounced:
+            changed = self.debounce(changed, timestamp)
+
+        # The changed triggers flip, so mask before ^ mask after is changed again
+        self.mask = mask ^ changed
+        return changed
+
+    # Of the edges whose condition is met this frame, the ones that have now held long enough
+    def debounce(self, changed, timestamp):
+        candidates = from_mask(changed, self.count)
+        pending = self.pending_frames
+
+        # Edges that were pending and are not anymore were suppressed
+        given_up = (pending > 0) & ~candidates
+        if given_up.any():
+            self.suppressed += int(np.count_nonzero(given_up))
+
+        # Count the frames in a row each candidate has held, and remember when it started
+        pending += 1
+        pending *= candidates
+        self.pending_since[pending == 1] = timestamp
+
+        required = np.where(self.state, self.deactivate_frames, self.activate_frames)
+        ready = (candidates & (pending >= required)
+                 & (timestamp - self.pending_since >= self.hold_times))
+        pending[ready] = 0
+        return to_mask(ready)
+
+
+# Pack a bool array into an integer, element i becomes bit i
+def to_mask(flags):
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+# Unpack the lowest count bits of an integer into a bool array
+def from_mask(mask, count):
+    packed = np.frombuffer(mask.to_bytes((count + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(packed, count=count, bitorder='little').astype(bool)
+
+
+# Index of every set bit of a mask, lowest first, going through only the bits that are set
+def set_bits(mask):
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
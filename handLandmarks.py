@@ -0,0 +1,64 @@
+"""
+Helpers for holding a hand's landmarks in a NumPy array.
+Mediapipe gives 21 landmarks per hand, each with an x, y and z coordinate,
+ so a whole hand fits in one (21, 3) float32 array.
+
+The gesture interface keeps one array per hand and refills it once per frame,
+ so every gesture check reads plain array values instead of protobuf fields.
+Landmark backends hand their results over as HandResults, which hold one such array per hand.
+"""
+
+import numpy as np  # pip install numpy
+
+# Number of landmarks in one hand
+NUM_LANDMARKS = 21
+
+# Column of each coordinate in a landmark array
+X = 0
+Y = 1
+Z = 2
+
+# Pairs of landmarks joined by a bone, used for drawing a hand
+HAND_CONNECTIONS = ((0, 1), (1, 2), (2, 3), (3, 4),
+                    (0, 5), (5, 6), (6, 7), (7, 8),
+                    (5, 9), (9, 10), (10, 11), (11, 12),
+                    (9, 13), (13, 14), (14, 15), (15, 16),
+                    (13, 17), (17, 18), (18, 19), (19, 20), (0, 17))
+
+
+# Landmarks of both hands for one frame, a hand that was not found is None
+class HandResults:
+    __slots__ = ('left_hand_landmarks', 'right_hand_landmarks')
+
+    def __init__(self, left_hand_landmarks=None, right_hand_landmarks=None):
+        self.left_hand_landmarks = left_hand_landmarks
+        self.right_hand_landmarks = right_hand_landmarks
+
+
+# Make an empty landmark array for one hand
+def new_landmark_array():
+    return np.zeros((NUM_LANDMARKS, 3), dtype=np.float32)
+
+
+# Copy a hand's landmarks into the given array, returns False if the hand is missing
+def fill_landmarks(hand_landmarks, out):
+    # No landmarks means the hand is not in the frame
+    if hand_landmarks is None:
+        return False
+
+    # Arrays are copied straight in
+    if isinstance(hand_landmarks, np.ndarray):
+        np.copyto(out, hand_landmarks)
+        return True
+
+    # Read every landmark once and write them all into the reused buffer in one go
+    out[:] = [(landmark.x, landmark.y, landmark.z) for landmark in hand_landmarks.landmark]
+    return True
+
+
+# Turn a mediapipe landmark list into a new landmark array, or None if the hand is missing
+def landmarks_to_array(hand_landmarks):
+    if hand_landmarks is None:
+        return None
+    return np.array([(landmark.x, landmark.y, landmark.z) for landmark in hand_landmarks.landmark],
+                    dtype=np.float32)
@@ -0,0 +1,71 @@
+"""
+Slows inference down while nobody is in front of the camera.
+
+After idle_after frames in a row without any hand, the governor goes idle and only lets frames through
+ to inference at idle_rate frames per second, the rest are skipped before they are even converted.
+The first frame with a hand in it brings it straight back to full rate.
+It keeps track of how long it spent active and idle, and how many frames it skipped.
+"""
+
+import time
+
+
+class IdleGovernor:
+    def __init__(self, idle_after=30, idle_rate=5.0):
+        self.idle_after = idle_after
+        self.idle_rate = idle_rate
+
+        self.idle = False
+        self.frames_without_hands = 0
+        self.last_let_through = 0.0
+
+        # Time spent in each state, the current state's time is added when it ends
+        self.state_since = time.perf_counter()
+        self.time_in_state = {'active': 0.0, 'idle': 0.0}
+        self.skipped_frames = 0
+
+    # Frames per second inference runs at right now, None means as fast as frames come
+    @property
+    def rate(self):
+        return self.idle_rate if self.idle else None
+
+    # Called before inference, False means the frame should be skipped
+    def should_process(self, now):
+        if not self.idle:
+            return True
+
+        if now - self.last_let_through >= 1 / self.idle_rate:
+            self.last_let_through = now
+            return True
+
+        self.skipped_frames += 1
+        return False
+
+    # Called after inference with whether any hand was found
+    def update(self, hands_found, now):
+        if hands_found:
+            self.frames_without_hands = 0
+            if self.idle:
+                self.switch(False, now)
+
+        else:
+            self.frames_without_hands += 1
+            if not self.idle and self.frames_without_hands >= self.idle_after:
+                self.switch(True, now)
+
+    def switch(self, idle, now):
+        self.time_in_state['idle' if self.idle else 'active'] += now - self.state_since
+        self.state_since = now
+        self.idle = idle
+        self.last_let_through = now
+
+    def stats(self):
+        time_in_state = dict(self.time_in_state)
+        time_in_state['idle' if self.idle else 'active'] += time.perf_counter() - self.state_since
+        return {
+            'state': 'idle' if self.idle else 'active',
+            'rate': self.rate,
+            'active_time': time_in_state['active'],
+            'idle_time': time_in_state['idle'],
+            'skipped_frames': self.skipped_frames,
+        }
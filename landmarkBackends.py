@@ -0,0 +1,131 @@
+"""
+Landmark backends find the hands in an RGB image and return their landmarks as HandResults.
+
+The gesture interface only ever looks at the two hands, so the model running behind it can be swapped:
+ 'holistic' runs mediapipe's Holistic model, which also tracks the pose and the full face mesh,
+ 'hands' runs mediapipe's Hands model, which only looks for hands and is much cheaper on CPU-only machines.
+
+Hands does not say which hand is left and right the way Holistic does.
+It labels each hand as if the image were mirrored like a selfie,
+ so on a plain webcam image its 'Left' is the person's right hand.
+Set mirrored=True if the frames are already flipped before they reach the backend.
+
+Only Hands can be given frames cropped around the hands, see supports_hand_roi.
+Holistic finds the hands from the pose, and a crop around the hands cuts off the face and body the pose needs.
+
+Mediapipe is only imported when a backend is created, so code that never runs a model does not need it.
+Use create_backend() with a backend's name, or benchmarkBackends.py to compare them on your machine.
+"""
+
+from handLandmarks import HandResults, landmarks_to_array
+
+
+class HolisticBackend:
+    name = 'holistic'
+
+    # The hands are found from the pose, which needs the body in the image
+    supports_hand_roi = False
+
+    def __init__(self, min_detection_confidence=0.9, min_tracking_confidence=0.9):
+        import mediapipe as mp  # pip install mediapipe
+
+        self.model = mp.solutions.holistic.Holistic(min_detection_confidence=min_detection_confidence,
+                                                    min_tracking_confidence=min_tracking_confidence)
+
+    def process(self, image):
+        results = self.model.process(image)
+        return HandResults(landmarks_to_array(results.left_hand_landmarks),
+                           landmarks_to_array(results.right_hand_landmarks))
+
+    def close(self):
+        self.model.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class HandsBackend:
+    name = 'hands'
+
+    # Crops are tracked by their own model, see __init__
+    supports_hand_roi = True
+
+    # With hand_roi, process() is also given the crop each image was cut from.
+    # Without static_image_mode the model tracks each hand from where it was in the previous image,
+    #  which only holds while every image is the same view, so the crops go to a model of their own
+    #  that is restarted whenever the crop box moves while it is tracking a hand,
+    #  and the whole frames used every few frames to find new hands are searched by a second model on their own.
+    def __init__(self, min_detection_confidence=0.9, min_tracking_confidence=0.9, model_complexity=1,
+                 mirrored=False, hand_roi=False):
+        import mediapipe as mp  # pip install mediapipe
+
+        def make_model(static_image_mode):
+            return mp.solutions.hands.Hands(static_image_mode=static_image_mode, max_num_hands=2,
+                                            model_complexity=model_complexity,
+                                            min_detection_confidence=min_detection_confidence,
+                                            min_tracking_confidence=min_tracking_confidence)
+
+        self.model = make_model(False)
+        self.full_frame_model = make_model(True) if hand_roi else None
+
+        # Crop the model last saw and whether it found a hand in it, which it then tracks into the next image
+        self.crop = None
+        self.tracking = False
+        self.restarts = 0
+
+        # Map Hands' handedness labels onto the person's left and right hand
+        if mirrored:
+            self.sides = {'Left': 'left', 'Right': 'right'}
+        else:
+            self.sides = {'Left': 'right', 'Right': 'left'}
+
+    def process(self, image, crop=None):
+        if self.full_frame_model is not None and crop is None:
+            results = self.full_frame_model.process(image)
+        else:
+            # Hands tracked in another crop would be looked for in the wrong place
+            if crop != self.crop and self.tracking:
+                self.model.reset()
+                self.restarts += 1
+            self.crop = crop
+            results = self.model.process(image)
+            self.tracking = bool(results.multi_hand_landmarks)
+
+        hands = {'left': None, 'right': None}
+        scores = {'left': -1.0, 'right': -1.0}
+
+        if results.multi_hand_landmarks:
+            for hand_landmarks, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                label = handedness.classification[0]
+                side = self.sides[label.label]
+
+                # If both hands get the same label, keep the one Hands is more sure about
+                if label.score > scores[side]:
+                    hands[side] = landmarks_to_array(hand_landmarks)
+                    scores[side] = label.score
+
+        return HandResults(hands['left'], hands['right'])
+
+    def close(self):
+        self.model.close()
+        if self.full_frame_model is not None:
+            self.full_frame_model.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Every backend by name
+BACKENDS = {backend.name: backend for backend in (HolisticBackend, HandsBackend)}
+
+
+def create_backend(name, **options):
+    if name not in BACKENDS:
+        raise ValueError(f'unknown landmark backend {name!r}, choose from {", ".join(BACKENDS)}')
+    return BACKENDS[name](**options)
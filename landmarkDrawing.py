@@ -0,0 +1,27 @@
+"""
+Draws hand landmarks from landmark arrays onto a frame,
+ the same way mediapipe's drawing utils draw a hand, but without needing mediapipe's results.
+"""
+
+import cv2  # pip install opencv-python
+
+from handLandmarks import HAND_CONNECTIONS
+
+# Colors in BGR
+LANDMARK_COLOR = (0, 0, 255)
+CONNECTION_COLOR = (224, 224, 224)
+
+
+# Draw one hand's (21, 3) landmark array onto a BGR frame, nothing is drawn if the hand is None
+def draw_hand(frame, landmarks):
+    if landmarks is None:
+        return
+
+    # Landmarks are normalized, so scale them to pixels
+    height, width = frame.shape[:2]
+    points = [(int(x * width), int(y * height)) for x, y in landmarks[:, :2].tolist()]
+
+    for start, end in HAND_CONNECTIONS:
+        cv2.line(frame, points[start], points[end], CONNECTION_COLOR, 2)
+    for point in points:
+        cv2.circle(frame, point, 3, LANDMARK_COLOR, -1)
@@ -0,0 +1,88 @@
+"""
+Smooths a hand's landmarks over time with a One Euro filter, to stop gestures flickering.
+
+Raw landmarks jitter a little from frame to frame, and a finger held right at a trigger's threshold
+ crosses it back and forth, firing activation and deactivation pairs that each call module code.
+The One Euro filter is a low-pass filter whose cutoff frequency rises with the speed of the landmark:
+ a hand held still is smoothed strongly, which removes the jitter, and a moving hand is barely smoothed,
+ so real gestures are not delayed.
+See Casiez et al., "1 Euro Filter: A Simple Speed-based Low-pass Filter for Noisy Input in Interactive Systems".
+
+All 63 coordinates of a hand are filtered at once with numpy, into buffers made once,
+ and each hand has its own filter, reset when the hand is lost so a returning hand starts fresh.
+The defaults are the ones MediaPipe uses to smooth hand landmarks in normalized image coordinates.
+"""
+
+import math
+
+import numpy as np  # pip install numpy
+
+from handLandmarks import new_landmark_array
+
+
+class OneEuroFilter:
+    # frame_rate is assumed when a frame's time does not move forward, such as for frames without timestamps
+    def __init__(self, min_cutoff=0.05, beta=80.0, derivative_cutoff=1.0, frame_rate=30.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.frame_period = 1 / frame_rate
+
+        # Filtered landmarks and their speed from the last frame
+        self.previous = new_landmark_array()
+        self.speed = new_landmark_array()
+        self.previous_time = None
+
+        # Scratch space for the current frame
+        self.change = new_landmark_array()
+        self.alpha = new_landmark_array()
+
+    # Start again from the next frame, as for a hand that was just found
+    def reset(self):
+        self.previous_time = None
+
+    # Weight of the new value for a low-pass filter with the given cutoff frequency, array or number
+    @staticmethod
+    def smoothing(cutoff, period, out=None):
+        # alpha = 1 / (1 + tau / period) with tau = 1 / (2 pi cutoff)
+        if out is None:
+            return 1 / (1 + 1 / (2 * math.pi * cutoff * period))
+        np.multiply(cutoff, 2 * math.pi * period, out=out)
+        np.reciprocal(out, out=out)
+        out += 1
+        return np.reciprocal(out, out=out)
+
+    # Filter a (21, 3) landmark array in place, timestamp in seconds
+    def apply(self, landmarks, timestamp):
+        if self.previous_time is None:
+            np.copyto(self.previous, landmarks)
+            self.speed.fill(0)
+            self.previous_time = timestamp
+            return landmarks
+
+        period = timestamp - self.previous_time
+        if period <= 0:
+            period = self.frame_period
+        self.previous_time = timestamp
+
+        # Smoothed speed of every coordinate
+        change = self.change
+        np.subtract(landmarks, self.previous, out=change)
+        change /= period
+        change -= self.speed
+        change *= self.smoothing(self.derivative_cutoff, period)
+        self.speed += change
+
+        # The faster a coordinate moves, the higher its cutoff and the less it is smoothed
+        alpha = self.alpha
+        np.abs(self.speed, out=alpha)
+        alpha *= self.beta
+        alpha += self.min_cutoff
+        self.smoothing(alpha, period, out=alpha)
+
+        # previous += alpha * (landmarks - previous), which is the filtered landmarks
+        np.subtract(landmarks, self.previous, out=change)
+        change *= alpha
+        self.previous += change
+        np.copyto(landmarks, self.previous)
+        return landmarks
@@ -0,0 +1,186 @@
+"""
+Publishes every frame's hand landmarks into shared memory, so other processes can read them at frame rate
+ without a socket and without copying.
+
+The detector writes into a ring of fixed size records in a multiprocessing.shared_memory block,
+ and readers in other processes attach to the block by name and look at the newest or recent frames.
+
+Layout of the block, all little endian, version 1:
+
+    offset 0    magic b'GNUISHM\\0'
+    offset 8    uint32  version
+    offset 12   uint32  record size, 520
+    offset 16   uint32  landmarks per hand, 21
+    offset 20   uint32  capacity, number of records in the ring
+    offset 32   uint64  started, frames whose writing has started
+    offset 40   uint64  published, frames completely written
+    offset 64   capacity records, frame n is in record n % capacity
+
+Records are the same as in a landmark trace file, see landmarkTrace.py:
+ float64 timestamp, uint32 hands, uint32 sequence, float32 left[21][3] and float32 right[21][3],
+ where sequence is the frame number n, counting from 0, and only the lowest 32 bits of it.
+
+The writer works like a seqlock: it adds one to started, writes the record, then adds one to published.
+A reader wanting frame n checks it was published (n < published), reads it, and afterwards checks
+ the writer has not started overwriting it since (started <= n + capacity).
+If that check fails the frame was overwritten while being read and has to be skipped or read again.
+Zero-copy views into the ring stay valid only until the writer comes around again, so a reader
+ that keeps up holds on to them, and one that needs a frame for longer uses read(), which copies it.
+"""
+
+import struct
+import time
+
+import numpy as np  # pip install numpy
+from multiprocessing import shared_memory
+
+from handLandmarks import NUM_LANDMARKS, HandResults, fill_landmarks
+from landmarkTrace import LEFT_HAND, RIGHT_HAND, TRACE_DTYPE
+
+MAGIC = b'GNUISHM\0'
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = struct.Struct('<8sIIII')
+COUNTERS_OFFSET = 32
+
+
+def counters_view(buffer):
+    return np.ndarray((2,), dtype='<u8', buffer=buffer, offset=COUNTERS_OFFSET)
+
+
+class LandmarkRingWriter:
+    # name None lets the system pick a name, readers attach with self.name
+    def __init__(self, name=None, capacity=256):
+        self.capacity = capacity
+        self.memory = shared_memory.SharedMemory(name, create=True,
+                                                 size=HEADER_SIZE + capacity * TRACE_DTYPE.itemsize)
+        self.name = self.memory.name
+
+        self.memory.buf[:HEADER_SIZE] = HEADER.pack(MAGIC, VERSION, TRACE_DTYPE.itemsize, NUM_LANDMARKS,
+                                                    capacity).ljust(HEADER_SIZE, b'\0')
+        self.counters = counters_view(self.memory.buf)
+        self.counters[:] = 0
+        self.records = np.ndarray((capacity,), dtype=TRACE_DTYPE, buffer=self.memory.buf, offset=HEADER_SIZE)
+        self.frames = 0
+
+        # Views of each field over the whole ring
+        self.timestamps = self.records['timestamp']
+        self.hands = self.records['hands']
+        self.sequences = self.records['sequence']
+        self.left = self.records['left']
+        self.right = self.records['right']
+
+    def write(self, timestamp, results):
+        frame = self.frames
+        index = frame % self.capacity
+
+        self.counters[0] = frame + 1
+
+        # Landmarks go straight into shared memory, the only copy made
+        hands = 0
+        if fill_landmarks(results.left_hand_landmarks, self.left[index]):
+            hands |= LEFT_HAND
+        else:
+            self.left[index].fill(0)
+        if fill_landmarks(results.right_hand_landmarks, self.right[index]):
+            hands |= RIGHT_HAND
+        else:
+            self.right[index].fill(0)
+        self.timestamps[index] = timestamp
+        self.hands[index] = hands
+        self.sequences[index] = frame & 0xFFFFFFFF
+
+        self.counters[1] = frame + 1
+        self.frames = frame + 1
+
+    # Remove the block, readers still attached keep their mapping until they close it
+    def close(self):
+        del self.counters, self.records, self.timestamps, self.hands, self.sequences, self.left, self.right
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class LandmarkRingReader:
+    def __init__(self, name):
+        self.memory = attach(name)
+        magic, version, record_size, landmarks, capacity = HEADER.unpack_from(self.memory.buf)
+        if magic != MAGIC:
+            self.memory.close()
+            raise ValueError(f'shared memory {name!r} is not a landmark ring')
+        if version != VERSION or record_size != TRACE_DTYPE.itemsize or landmarks != NUM_LANDMARKS:
+            self.memory.close()
+            raise ValueError(f'shared memory {name!r} is a version {version} landmark ring, '
+                             f'only version {VERSION} can be read')
+
+        self.capacity = capacity
+        self.counters = counters_view(self.memory.buf)
+        self.records = np.ndarray((capacity,), dtype=TRACE_DTYPE, buffer=self.memory.buf, offset=HEADER_SIZE)
+        self.hands = self.records['hands']
+        self.left = self.records['left']
+        self.right = self.records['right']
+
+    # Number of the newest completely written frame, -1 before the first one
+    def latest(self):
+        return int(self.counters[1]) - 1
+
+    # Whether frame n is written and has not been overwritten, check again after reading a view
+    def valid(self, frame):
+        return 0 <= frame < int(self.counters[1]) and int(self.counters[0]) <= frame + self.capacity
+
+    # Landmarks of frame n as HandResults holding views into shared memory, None if it is not there (anymore)
+    def results(self, frame):
+        if not self.valid(frame):
+            return None
+        index = frame % self.capacity
+        hands = self.hands[index]
+        return HandResults(self.left[index] if hands & LEFT_HAND else None,
+                           self.right[index] if hands & RIGHT_HAND else None)
+
+    # Copy frame n into out, an array of one TRACE_DTYPE record,
+    #  returns False if it was not there or was overwritten while copying
+    def read(self, frame, out):
+        if not self.valid(frame):
+            return False
+        out[0] = self.records[frame % self.capacity]
+        return self.valid(frame)
+
+    # Wait for a frame newer than after, returns the newest frame number or None on timeout
+    def wait_newer(self, after, timeout=None, poll_interval=0.001):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            latest = self.latest()
+            if latest > after:
+                return latest
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def close(self):
+        del self.counters, self.records, self.hands, self.left, self.right
+        self.memory.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Attach to a block without this process taking ownership of it
+def attach(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 every attached block is registered to be removed when this process exits
+    from multiprocessing import resource_tracker
+    memory = shared_memory.SharedMemory(name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
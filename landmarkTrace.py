@@ -0,0 +1,147 @@
+"""
+Records the hand landmarks of every frame to a compact binary file and replays them without a camera.
+
+A trace file is a 64 byte header followed by one fixed size record per frame:
+
+    header   magic b'GNUITRC\\0', then little endian uint32 version, record size and landmarks per hand,
+             the rest is zero
+    record   float64  timestamp   frame time in seconds, time.perf_counter() of the recording machine for
+                                  a camera or the position in the recording for a file
+             uint32   hands       bit 0 set if the left hand was found, bit 1 for the right hand
+             uint32   sequence    frame number
+             float32  left[21][3] left hand landmarks, zero if the hand was not found
+             float32  right[21][3]
+
+Since every record has the same size, replay maps the file into memory and hands out views into it,
+ so nothing is parsed or copied, and hours of recording replay as fast as the gesture logic runs.
+Replay goes through check_if_active exactly like live frames do, so the same trace always gives
+ the same gestures, which makes field bug reports easy to reproduce.
+"""
+
+import os
+import struct
+import time
+
+import numpy as np  # pip install numpy
+
+from handLandmarks import NUM_LANDMARKS, HandResults, fill_landmarks
+
+MAGIC = b'GNUITRC\0'
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = struct.Struct('<8sIII')
+
+# Bits of the hands field
+LEFT_HAND = 1
+RIGHT_HAND = 2
+
+TRACE_DTYPE = np.dtype([('timestamp', '<f8'),
+                        ('hands', '<u4'),
+                        ('sequence', '<u4'),
+                        ('left', '<f4', (NUM_LANDMARKS, 3)),
+                        ('right', '<f4', (NUM_LANDMARKS, 3))])
+
+
+class TraceRecorder:
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, TRACE_DTYPE.itemsize, NUM_LANDMARKS).ljust(HEADER_SIZE, b'\0'))
+
+        # One record reused for every frame
+        self.record = np.zeros(1, dtype=TRACE_DTYPE)
+        self.left = self.record['left'][0]
+        self.right = self.record['right'][0]
+        self.frames = 0
+
+    def write(self, timestamp, results, sequence=0):
+        hands = 0
+        if fill_landmarks(results.left_hand_landmarks, self.left):
+            hands |= LEFT_HAND
+        else:
+            self.left.fill(0)
+        if fill_landmarks(results.right_hand_landmarks, self.right):
+            hands |= RIGHT_HAND
+        else:
+            self.right.fill(0)
+
+        self.record['timestamp'] = timestamp
+        self.record['hands'] = hands
+        self.record['sequence'] = sequence
+        self.file.write(self.record.data)
+        self.frames += 1
+
+    # Write records taken from another trace as they are, such as a TraceReplay's records or a slice of them
+    def write_records(self, records):
+        self.file.write(np.ascontiguousarray(records, dtype=TRACE_DTYPE).data)
+        self.frames += len(records)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TraceReplay:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            magic, version, record_size, landmarks = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a landmark trace')
+        if version != VERSION or record_size != TRACE_DTYPE.itemsize or landmarks != NUM_LANDMARKS:
+            raise ValueError(f'{path} is a version {version} trace, only version {VERSION} can be replayed')
+
+        # A record cut short by a crash while recording is left out
+        count = (os.path.getsize(path) - HEADER_SIZE) // record_size
+        if count:
+            self.records = np.memmap(path, dtype=TRACE_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=TRACE_DTYPE)
+
+        # Views of each field over the whole file
+        self.timestamps = self.records['timestamp']
+        self.hands = self.records['hands']
+        self.left = self.records['left']
+        self.right = self.records['right']
+
+    def __len__(self):
+        return len(self.records)
+
+    # Landmarks of one frame as HandResults holding views into the file
+    def results(self, index):
+        hands = self.hands[index]
+        return HandResults(self.left[index] if hands & LEFT_HAND else None,
+                           self.right[index] if hands & RIGHT_HAND else None)
+
+    # Go through (timestamp, results) of every frame
+    def __iter__(self):
+        for index in range(len(self.records)):
+            yield float(self.timestamps[index]), self.results(index)
+
+
+# Feed a trace through the interface's gesture logic, as fast as possible or at the recorded pace
+def replay_trace(interface, trace, realtime=False):
+    started = time.perf_counter()
+    first_timestamp = None
+    frames = 0
+
+    for timestamp, results in trace:
+        if realtime:
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            delay = (timestamp - first_timestamp) - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+        interface.frame_timestamp = timestamp
+        interface.check_if_active(results)
+        frames += 1
+
+        # Stop where the live interface would have stopped
+        if interface.stop_requested.is_set():
+            break
+
+    return frames
@@ -0,0 +1,105 @@
+"""
+Latency histograms for the camera loop, from a frame being captured to a module function being called.
+
+LatencyHistogram works like an HDR histogram: latencies are counted in whole microseconds,
+ in buckets that are one microsecond wide for small values and grow with the value,
+ so every latency from a microsecond to minutes is kept to within about 1% in a fixed, small list of counts.
+Recording a latency is a bit_length, a shift and one list increment, cheap enough for every frame.
+
+There are no locks. Each histogram is only ever written by one thread, the stage or worker it belongs to,
+ and reading it from another thread copies the counts, which at worst misses the latencies being recorded
+ at that moment. Histograms of several threads are combined with merge() when they are reported.
+"""
+
+# Sub-buckets per power of two, 2 ** 7 keeps each bucket within 1/64 of its value
+SUB_BUCKET_BITS = 7
+
+# Latencies above this many seconds are counted as this many seconds
+HIGHEST = 600.0
+
+
+class LatencyHistogram:
+    def __init__(self, sub_bucket_bits=SUB_BUCKET_BITS, highest=HIGHEST):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.half_count = self.sub_bucket_count // 2
+        self.highest = int(highest * 1e6)
+        self.counts = [0] * (self.index(self.highest) + 1)
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    # Bucket of a latency in microseconds
+    def index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        exponent = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (exponent - 1) * self.half_count + (value >> exponent) - self.half_count
+
+    # Highest latency in microseconds counted in a bucket
+    def value_at(self, index):
+        if index < self.sub_bucket_count:
+            return index
+        exponent, sub_bucket = divmod(index - self.sub_bucket_count, self.half_count)
+        return ((sub_bucket + self.half_count + 1) << (exponent + 1)) - 1
+
+    # Count one latency given in seconds
+    def record(self, seconds):
+        value = int(seconds * 1e6)
+        if value < 0:
+            value = 0
+        elif value > self.highest:
+            value = self.highest
+        self.counts[self.index(value)] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    # Latency in seconds that percent of the recorded latencies are at or below
+    def percentile(self, percent, counts=None):
+        counts = self.counts if counts is None else counts
+        total = sum(counts)
+        if not total:
+            return 0.0
+
+        wanted = max(1, -(-total * percent // 100))
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= wanted:
+                return min(self.value_at(index), self.max) / 1e6
+        return self.max / 1e6
+
+    # A new histogram with the counts of this one and the others added together
+    def merge(self, *others):
+        merged = LatencyHistogram(self.sub_bucket_bits, self.highest / 1e6)
+        for histogram in (self,) + others:
+            merged.counts = [total + count for total, count in zip(merged.counts, histogram.counts)]
+            merged.total += histogram.total
+            merged.sum += histogram.sum
+            merged.max = max(merged.max, histogram.max)
+        return merged
+
+    def stats(self):
+        # Copy first so every number comes from the same counts, even while another thread records
+        counts = list(self.counts)
+        total = sum(counts)
+        return {
+            'count': total,
+            'mean': self.sum / self.total / 1e6 if self.total else 0.0,
+            'p50': self.percentile(50, counts),
+            'p95': self.percentile(95, counts),
+            'p99': self.percentile(99, counts),
+            'max': self.max / 1e6,
+        }
+
+
+# Table of p50, p95 and p99 for each named histogram, in milliseconds
+def report(histograms):
+    lines = [f'{"latency":<16}{"count":>8}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}']
+    for name, histogram in histograms.items():
+        stats = histogram.stats()
+        lines.append(f'{name:<16}{stats["count"]:>8}{stats["mean"] * 1000:>10.2f}{stats["p50"] * 1000:>10.2f}'
+                     f'{stats["p95"] * 1000:>10.2f}{stats["p99"] * 1000:>10.2f}{stats["max"] * 1000:>10.2f}')
+    return '\n'.join(lines)
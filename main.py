@@ -18,9 +18,10 @@ allowing you to have different functionalities for activation and deactivation.
 Basic Instructions:
 Exit program by triggering both l0 and l3, (left thumb and ring finger).
 Each l-code corresponds to a module number. For example, l2 sets right hand commands to use module 2.
-As you can see below at import custom mods,
- you can change the names of the modules imported to your custom ones.
-For example, "import myMod as Module1".
+The module of each mode is set in modules.json,
+ you can change the names of the modules there to your custom ones.
+For example, "1": "myMod".
+A module is only imported the first time its mode is selected.
 
 Once your modules are programed and imported to this main framework you are ready to have some fun!
 """
@@ -33,59 +34,230 @@ You must release r0 while still tilting.
 """
 
 # import the necessary packages
-import mediapipe as mp  # pip install mediapipe
-import cv2  # pip install opencv-python
-
-# import custom mods
-import basicInterfaceV1_mod as Module0
-import customMod1 as Module1
-import customMod2 as Module2
-import customMod3 as Module3
-import customMod4 as Module4
+import argparse
+import concurrent.futures
+import json
+import signal
+import threading
+import time
+
+# When the program started, startup time is measured from here
+STARTED_AT = time.perf_counter()
+
+import numpy as np  # pip install numpy
+
+# import landmark array helpers
+from handLandmarks import X, Y, new_landmark_array, fill_landmarks
+from gestureRules import (CompiledRules, Debounce, LEFT_HAND_RULES, RIGHT_HAND_RULES, RIGHT_HAND_TILTS, TILTS,
+                          set_bits)
+from dispatchTable import DispatchTable, slot
+from callbackExecutor import CallbackExecutor
+from frameSources import open_source
+from pipeline import Pipeline, FramePacket
+from landmarkBackends import BACKENDS, create_backend
+from previewRenderer import PreviewRenderer
+from preprocessing import FramePreprocessor
+from idleGovernor import IdleGovernor
+from landmarkTrace import TraceRecorder, TraceReplay, replay_trace
+from landmarkSharedMemory import LandmarkRingWriter
+from landmarkFilter import OneEuroFilter
+from latencyStats import LatencyHistogram, report as latency_report
+from eventLog import CATEGORIES, FORMATS, EventLog
+from gestureEvents import EventBus, GestureEvent
+from eventServer import EventServer
+
+# Custom mods are listed in modules.json and imported when their mode is first selected
+from moduleLoader import DEFAULT_CONFIG, ModuleLoader, read_config
 
 
 class GestureControlInterface:
-    def __init__(self):
-        # State variables to track changes in gestures
-        self.previous_gestures = {'l0': False, 'l1': False, 'l2': False, 'l3': False, 'l4': False,
-                                  'r0_without_tilt': False, 'r1_without_tilt': False, 'r2_without_tilt': False,
-                                  'r3_without_tilt': False, 'r4_without_tilt': False,
-                                  'r0_tilted_right': False, 'r1_tilted_right': False, 'r2_tilted_right': False,
-                                  'r3_tilted_right': False, 'r4_tilted_right': False,
-                                  'r0_tilted_left': False, 'r1_tilted_left': False, 'r2_tilted_left': False,
-                                  'r3_tilted_left': False, 'r4_tilted_left': False}
+    def __init__(self, modules=None, callback_workers=1, callback_queue=64, callback_policy='block',
+                 backend='holistic', inference_width=640, hand_roi=False, queue_size=2, idle_after=30,
+                 idle_rate=5.0, preview='always', preview_fps=None, record=None, source=0, log_path=None,
+                 log_format='text', log_categories=CATEGORIES, share_landmarks=None, smoothing=False,
+                 smooth_min_cutoff=0.05, smooth_beta=80.0, debounce=None, module_config=DEFAULT_CONFIG,
+                 reload_interval=None):
+        # Debounce settings by gesture name, 'left' or 'right' for all of a hand's gestures,
+        #  and 'left_hand' or 'right_hand' whose deactivate_frames is how many frames in a row a hand
+        #  has to be missing before it is deactivated
+        self.debounce = debounce or {}
+
+        # Gesture rules for each hand, they also hold whether each gesture is activated
+        self.left_rules = CompiledRules(LEFT_HAND_RULES, debounce=self.debounce)
+        self.right_rules = CompiledRules(RIGHT_HAND_RULES, RIGHT_HAND_TILTS, self.debounce)
+
+        # Module of every mode, from module_config and each imported the first time its mode is selected,
+        #  or the list of modules given, the mode number is the position in the list
+        self.modules = ModuleLoader.from_config(module_config) if modules is None else ModuleLoader(modules)
+
+        # Seconds between checks of the module files for changes while running, None to never reload them
+        self.reload_interval = reload_interval
+
+        # Module functions for every mode, finger, tilt and edge, a mode does nothing until its module is loaded
+        self.dispatch = DispatchTable(self.modules.modules,
+                                      [mode for mode, loaded in enumerate(self.modules.loaded) if not loaded])
+
+        # Module functions run on worker threads so they never hold up the camera loop
+        self.callbacks = CallbackExecutor(callback_workers, callback_queue, callback_policy)
+
+        # Where each right hand rule's activation function sits in a dispatch row,
+        #  its deactivation function is in the slot right after it
+        self.right_slots = [slot(rule.finger, TILTS.index(rule.tilt), 0) for rule in self.right_rules.rules]
+
+        # Exit gestures, l0 and l3, as bits of the left hand's gesture mask
+        self.exit_mask = (1 << self.left_rules.names.index('l0')) | (1 << self.left_rules.names.index('l3'))
+
+        # Mode 0 is selected from the start, its module is loaded by run() while the camera and model start up,
+        #  or else on the first right hand gesture
         self.mode = 0
+
         self.left_hand_active = False
         self.right_hand_active = False
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_holistic = mp.solutions.holistic
+
+        # One reused (21, 3) landmark array per hand, refilled every frame
+        self.left_landmarks = new_landmark_array()
+        self.right_landmarks = new_landmark_array()
+        self.left_hand_present = False
+        self.right_hand_present = False
+
+        # Frames in a row each active hand has been missing, and how many it may miss before it is deactivated
+        self.left_missing_frames = 0
+        self.right_missing_frames = 0
+        self.left_loss_frames = self.debounce.get('left_hand', Debounce()).deactivate_frames
+        self.right_loss_frames = self.debounce.get('right_hand', Debounce()).deactivate_frames
+        self.suppressed_hand_losses = 0
+
+        # One Euro filter per hand that smooths landmark jitter before the gesture logic, None when off
+        if smoothing:
+            self.left_filter = OneEuroFilter(smooth_min_cutoff, smooth_beta)
+            self.right_filter = OneEuroFilter(smooth_min_cutoff, smooth_beta)
+        else:
+            self.left_filter = self.right_filter = None
+
+        # Time of the frame being handled, in the clock of the source it came from,
+        #  and the time.perf_counter() it was captured at, None when it did not come from a source
+        self.frame_timestamp = 0.0
+        self.frame_captured_at = None
+        self.frames_read = 0
+
+        # Seconds from STARTED_AT until the first frame was read and until the first hand or gesture was
+        #  recognized, None until then, and how long each startup step took
+        self.startup_time = None
+        self.first_gesture_time = None
+        self.startup_steps = {}
+
+        # Publishes a GestureEvent for every hand, gesture and mode change to any number of subscribers
+        self.events = EventBus()
+
+        # Writes hand, gesture and mode changes on its own thread, to stdout when log_path is None
+        self.event_log = EventLog(log_path, log_categories, log_format)
+
+        # Set by stop() to end the camera loop
+        self.stop_requested = threading.Event()
+
+        # Camera index, video file or directory of images to read frames from
+        self.source = source
+
+        # Name of the landmark backend, 'holistic' or the cheaper hands-only 'hands'
+        self.backend_name = backend
+
+        # Shrinks frames to the inference width and, with hand_roi, crops them around the tracked hands.
+        # Holistic cannot find hands in a crop around them, see landmarkBackends.py.
+        if hand_roi and backend in BACKENDS and not BACKENDS[backend].supports_hand_roi:
+            raise ValueError(f"hand_roi does not work with the {backend!r} backend, use 'hands'")
+        # Each pipeline queue can hold queue_size images, so a couple more buffers are needed than that.
+        self.queue_size = queue_size
+        self.preprocessor = FramePreprocessor(inference_width, hand_roi, buffers=queue_size + 2)
+
+        # Preview window, 'always', 'hands' for only frames with hands, or 'off' to run headless
+        self.preview = PreviewRenderer(preview, preview_fps)
+
+        # Path of a trace file to record every frame's landmarks to, None to not record
+        self.record_path = record
+        self.recorder = None
+
+        # Name of a shared memory block to publish every frame's landmarks in for other processes, None to not
+        self.share_name = share_landmarks
+        self.shared_landmarks = None
+
+        # Drops to idle_rate inferences per second after idle_after frames without hands, None keeps full rate
+        self.governor = IdleGovernor(idle_after, idle_rate) if idle_rate else None
+
+        # Time each step took since the step before it finished, queue waits included,
+        #  and 'frame' from capture until the gesture logic is done with it.
+        # Each histogram is only written by the stage thread of its step.
+        self.latency = {name: LatencyHistogram() for name in ('preprocess', 'inference', 'gesture', 'frame')}
+
+    # Whether each gesture is activated, by gesture name
+    @property
+    def previous_gestures(self):
+        gestures = {name: bool(self.left_rules.mask >> index & 1) for index, name in enumerate(self.left_rules.names)}
+        gestures.update((name, bool(self.right_rules.mask >> index & 1))
+                        for index, name in enumerate(self.right_rules.names))
+        return gestures
+
+    # Activated gestures of the left and right hand as two bitmasks, bit i for the hand's rule i.
+    # Cheap to keep and compare, for example to check two runs went through the same states.
+    def gesture_state(self):
+        return self.left_rules.mask, self.right_rules.mask
+
+    # Copy both hands' landmarks into their arrays, once per frame
+    def snapshot_landmarks(self, results):
+        self.left_hand_present = fill_landmarks(results.left_hand_landmarks, self.left_landmarks)
+        self.right_hand_present = fill_landmarks(results.right_hand_landmarks, self.right_landmarks)
+
+        # Smooth the copies, a lost hand's filter starts over when it comes back
+        if self.left_filter is not None:
+            if self.left_hand_present:
+                self.left_filter.apply(self.left_landmarks, self.frame_timestamp)
+            else:
+                self.left_filter.reset()
+            if self.right_hand_present:
+                self.right_filter.apply(self.right_landmarks, self.frame_timestamp)
+            else:
+                self.right_filter.reset()
 
     # Check if left or right hand is active
     def check_if_active(self, results):
 
+        # Swap in modules reloaded since the last frame, so one frame never uses two versions of a module
+        if self.modules.reloads:
+            self.swap_reloaded_modules()
+
+        # Read this frame's landmarks into the hand arrays
+        self.snapshot_landmarks(results)
+
+        # Whether the left hand's gestures were checked this frame
+        left_evaluated = False
+
         # If there are left hand landmarks
-        if results.left_hand_landmarks:
+        if self.left_hand_present:
+            landmarks = self.left_landmarks
+
+            # The hand came back before it was missing long enough to be deactivated
+            if self.left_missing_frames:
+                self.suppressed_hand_losses += 1
+                self.left_missing_frames = 0
 
             # First check if left hand index finger either middle finger is up.
-            if results.left_hand_landmarks.landmark[12].y < results.left_hand_landmarks.landmark[11].y or \
-                    results.left_hand_landmarks.landmark[8].y < results.left_hand_landmarks.landmark[7].y:
+            if landmarks[12, Y] < landmarks[11, Y] or landmarks[8, Y] < landmarks[7, Y]:
 
                 # Get the width and height of the left hand
-                hand_width = abs(results.left_hand_landmarks.landmark[5].x - results.left_hand_landmarks.landmark[17].x)
-                hand_height = results.left_hand_landmarks.landmark[0].y - results.left_hand_landmarks.landmark[5].y
+                hand_width = abs(landmarks[5, X] - landmarks[17, X])
+                hand_height = landmarks[0, Y] - landmarks[5, Y]
 
                 # If left hand height is greater than 1.5 times hand width and not active
                 if hand_width * 1.5 < hand_height and not self.left_hand_active:
                     # Activate left hand
                     # Call function for activation
-                    print('left hand activated')
+                    self.emit_event('hand', 'left', edge='activated')
 
                     # Update the state
                     self.left_hand_active = True
 
                 # If left hand height is less than the hand width and is active
                 elif hand_width >= hand_height and self.left_hand_active:
-                    print('left hand deactivated')
+                    self.emit_event('hand', 'left', edge='deactivated')
 
                     # Update the previous state to deactivated
                     self.left_hand_active = False
@@ -93,38 +265,58 @@ class GestureControlInterface:
                 # If left hand is active then listen for gestures
                 if self.left_hand_active:
                     # Call function for detecting gestures
-                    self.detect_left_hand_gestures(results)
+                    self.detect_left_hand_gestures(landmarks)
+                    left_evaluated = True
+
+                    # Nothing more to do once the exit gesture was made
+                    if self.stop_requested.is_set():
+                        return
+
+        # If no left hand landmarks and is active then make hand inactive,
+        #  once it has been missing for left_loss_frames frames in a row
+        elif self.left_hand_active:
+            self.left_missing_frames += 1
+            if self.left_missing_frames >= self.left_loss_frames:
+                self.left_missing_frames = 0
+                self.emit_event('hand', 'left', edge='deactivated')
 
-        # If no left hand landmarks and is active then make hand inactive
-        elif not results.left_hand_landmarks and self.left_hand_active:
-            print('left hand deactivated')
+                # Update the previous state to deactivated
+                self.left_hand_active = False
+
+        # A gesture edge only holds over frames it was checked on, one missed frame starts it over
+        if not left_evaluated:
+            self.left_rules.clear_pending()
 
-            # Update the previous state to deactivated
-            self.left_hand_active = False
+        # Whether the right hand's gestures were checked this frame
+        right_evaluated = False
 
         # If there are right hand landmarks
-        if results.right_hand_landmarks:
+        if self.right_hand_present:
+            landmarks = self.right_landmarks
+
+            # The hand came back before it was missing long enough to be deactivated
+            if self.right_missing_frames:
+                self.suppressed_hand_losses += 1
+                self.right_missing_frames = 0
 
             # First check if right hand index finger either middle finger is up.
-            if results.right_hand_landmarks.landmark[12].y < results.right_hand_landmarks.landmark[11].y or \
-                    results.right_hand_landmarks.landmark[8].y < results.right_hand_landmarks.landmark[7].y:
+            if landmarks[12, Y] < landmarks[11, Y] or landmarks[8, Y] < landmarks[7, Y]:
 
                 # Get the width and height of the right hand
-                hand_width = abs(
-                    results.right_hand_landmarks.landmark[5].x - results.right_hand_landmarks.landmark[17].x)
-                hand_height = results.right_hand_landmarks.landmark[0].y - results.right_hand_landmarks.landmark[5].y
+                hand_width = abs(landmarks[5, X] - landmarks[17, X])
+                hand_height = landmarks[0, Y] - landmarks[5, Y]
 
                 # If right hand height is greater than 1.5 times hand width and previously was not active
                 if hand_width * 1.5 < hand_height and not self.right_hand_active:
                     # Activate right hand
                     # Call function for activation
-                    print('right hand activated')
+                    self.emit_event('hand', 'right', edge='activated')
 
                     # Update the state
                     self.right_hand_active = True
 
                 elif hand_width >= hand_height and self.right_hand_active:
-                    print('right hand deactivated')
+                    self.emit_event('hand', 'right', edge='deactivated')
 
                     # Update the previous state to deactivated
                     self.right_hand_active = False
@@ -132,754 +324,477 @@ class GestureControlInterface:
                 # If right hand is active then listen for gestures
                 if self.right_hand_active:
                     # Call function for detecting gestures
-                    self.detect_right_hand_gestures(results)
-
-        # If no right hand landmarks and previously was active then make hand inactive
-        elif not results.right_hand_landmarks and self.right_hand_active:
-            print('right hand deactivated')
-
-            # Update the previous state to deactivated
-            self.right_hand_active = False
-
-    def detect_left_hand_gestures(self, results):
-        # If thumb's knuckle segment is over palm and previously was not activated
-        if (results.left_hand_landmarks.landmark[3].x > results.left_hand_landmarks.landmark[5].x
-                and not self.previous_gestures['l0']):
-
-            print('l0 activated')
-
-            # Update mode to 0
-            self.mode = 0
-            print('set mode to 0')
-
-            # Update the previous state to activated
-            self.previous_gestures['l0'] = True
-
-        # If thumb's tip is not over palm and previously was activated
-        elif (results.left_hand_landmarks.landmark[4].x < results.left_hand_landmarks.landmark[5].x
-              and self.previous_gestures['l0']):
-
-            print('l0 deactivated')
-
-            # Update the previous state to deactivated
-            self.previous_gestures['l0'] = False
-
-        # If index finger's tip is folded over palm and previously was not activated
-        if (results.left_hand_landmarks.landmark[8].y > results.left_hand_landmarks.landmark[5].y
-                and not self.previous_gestures['l1']):
-
-            print('l1 activated')
-
-            # Update mode to 1
-            self.mode = 1
-            print('set mode to 1')
-
-            # Update the previous state to activated
-            self.previous_gestures['l1'] = True
-
-        # If index finger's middle segment is angled away from palm and previously was activated
-        elif (results.left_hand_landmarks.landmark[7].y < results.left_hand_landmarks.landmark[6].y
-              and self.previous_gestures['l1']):
-
-            print('l1 deactivated')
-
-            # Update the previous state to deactivated
-            self.previous_gestures['l1'] = False
-
-        # If middle finger's tip is folded over palm and previously was not activated
-        if (results.left_hand_landmarks.landmark[12].y > results.left_hand_landmarks.landmark[9].y
-                and not self.previous_gestures['l2']):
-
-            print('l2 activated')
-
-            # Update mode to 2
-            self.mode = 2
-            print('set mode to 2')
-
-            # Update the previous state to activated
-            self.previous_gestures['l2'] = True
-
-        # If middle finger's middle segment is angled away from palm and previously was activated
-        elif (results.left_hand_landmarks.landmark[11].y < results.left_hand_landmarks.landmark[10].y
-              and self.previous_gestures['l2']):
-
-            print('l2 deactivated')
-
-            # Update the previous state to deactivated
-            self.previous_gestures['l2'] = False
-
-        # If ring finger's tip is folded over palm and previously was not activated
-        if (results.left_hand_landmarks.landmark[16].y > results.left_hand_landmarks.landmark[13].y
-                and not self.previous_gestures['l3']):
-
-            print('l3 activated')
-
-            # Update mode to 3
-            self.mode = 3
-            print('set mode to 3')
-
-            # Update the previous state to activated
-            self.previous_gestures['l3'] = True
+                    self.detect_right_hand_gestures(landmarks)
+                    right_evaluated = True
 
-        # If ring finger's middle segment is angled away from palm and previously was activated
-        elif (results.left_hand_landmarks.landmark[15].y < results.left_hand_landmarks.landmark[14].y
-              and self.previous_gestures['l3']):
+        # If no right hand landmarks and previously was active then make hand inactive,
+        #  once it has been missing for right_loss_frames frames in a row
+        elif self.right_hand_active:
+            self.right_missing_frames += 1
+            if self.right_missing_frames >= self.right_loss_frames:
+                self.right_missing_frames = 0
+                self.emit_event('hand', 'right', edge='deactivated')
 
-            print('l3 deactivated')
-
-            # Update the previous state to deactivated
-            self.previous_gestures['l3'] = False
-
-        # If pinky's tip is folded over palm and previously was not activated
-        if (results.left_hand_landmarks.landmark[20].y > results.left_hand_landmarks.landmark[17].y
-                and not self.previous_gestures['l4']):
+                # Update the previous state to deactivated
+                self.right_hand_active = False
 
-            print('l4 activated')
+        if not right_evaluated:
+            self.right_rules.clear_pending()
 
-            # Update mode to 4
-            self.mode = 4
-            print('set mode to 4')
+    def detect_left_hand_gestures(self, landmarks):
+        rules = self.left_rules
 
-            # Update the previous state to activated
-            self.previous_gestures['l4'] = True
+        # Go through every left hand trigger that changed this frame
+        for index in set_bits(rules.evaluate(landmarks, self.frame_timestamp)):
+            rule = rules.rules[index]
 
-        # If pinky's middle segment is angled away from palm and previously was activated
-        elif (results.left_hand_landmarks.landmark[19].y < results.left_hand_landmarks.landmark[18].y
-              and self.previous_gestures['l4']):
+            # If the finger is now activated then switch to its mode
+            if rules.mask >> index & 1:
+                self.emit_event('gesture', 'left', rule.finger, edge='activated')
 
-            print('l4 deactivated')
+                # Update mode to the finger's number if there is a module for it
+                if rule.finger < len(self.dispatch):
+                    self.load_mode(rule.finger)
+                    self.mode = rule.finger
+                    self.emit_event('mode', 'left', rule.finger)
 
-            # Update the previous state to deactivated
-            self.previous_gestures['l4'] = False
+            else:
+                self.emit_event('gesture', 'left', rule.finger, edge='deactivated')
 
         # If ring finger and thumb are folded over palm exit program
         # You are unlikely to accidentally exit using these two fingers
-        if self.previous_gestures['l0'] and self.previous_gestures['l3']:
-            # Destroy all the windows
-            cv2.destroyAllWindows()
-            exit(0)
-
-    def detect_right_hand_gestures(self, results):
-
-        # If right hand tilted right
-        if results.right_hand_landmarks.landmark[5].x < results.right_hand_landmarks.landmark[0].x:
-            # If thumb's tip crosses index finger's base knuckle horizontally and previously was not activated
-            if (results.right_hand_landmarks.landmark[4].x < results.right_hand_landmarks.landmark[5].x
-                    and not self.previous_gestures['r0_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_activated_tilted_right()
-                if self.mode == 1:
-                    Module1.r0_activated_tilted_right()
-                if self.mode == 2:
-                    Module2.r0_activated_tilted_right()
-                if self.mode == 3:
-                    Module3.r0_activated_tilted_right()
-                if self.mode == 4:
-                    Module4.r0_activated_tilted_right()
-
-                # Update the previous state to activated
-                self.previous_gestures['r0_tilted_right'] = True
-
-            # If thumb's middle segment is angled away from palm and was previously activated
-            elif (results.right_hand_landmarks.landmark[3].x > results.right_hand_landmarks.landmark[2].x
-                  and self.previous_gestures['r0_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_deactivated_tilted_right()
-                if self.mode == 1:
-                    Module1.r0_deactivated_tilted_right()
-                if self.mode == 2:
-                    Module2.r0_deactivated_tilted_right()
-                if self.mode == 3:
-                    Module3.r0_deactivated_tilted_right()
-                if self.mode == 4:
-                    Module4.r0_deactivated_tilted_right()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r0_tilted_right'] = False
-
-            # If index finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[8].y > results.right_hand_landmarks.landmark[5].y
-                    and not self.previous_gestures['r1_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_activated_tilted_right()
-                if self.mode == 1:
-                    Module1.r1_activated_tilted_right()
-                if self.mode == 2:
-                    Module2.r1_activated_tilted_right()
-                if self.mode == 3:
-                    Module3.r1_activated_tilted_right()
-                if self.mode == 4:
-                    Module4.r1_activated_tilted_right()
-
-                # Update the previous state to activated
-                self.previous_gestures['r1_tilted_right'] = True
-
-            # If index finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[7].y < results.right_hand_landmarks.landmark[6].y
-                  and self.previous_gestures['r1_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_deactivated_tilted_right()
-                if self.mode == 1:
-                    Module1.r1_deactivated_tilted_right()
-                if self.mode == 2:
-                    Module2.r1_deactivated_tilted_right()
-                if self.mode == 3:
-                    Module3.r1_deactivated_tilted_right()
-                if self.mode == 4:
-                    Module4.r1_deactivated_tilted_right()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r1_tilted_right'] = False
-
-            # If middle finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[12].y > results.right_hand_landmarks.landmark[9].y
-                    and not self.previous_gestures['r2_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_activated_tilted_right()
-                if self.mode == 1:
-                    Module1.r2_activated_tilted_right()
-                if self.mode == 2:
-                    Module2.r2_activated_tilted_right()
-                if self.mode == 3:
-                    Module3.r2_activated_tilted_right()
-                if self.mode == 4:
-                    Module4.r2_activated_tilted_right()
-
-                # Update the previous state to activated
-                self.previous_gestures['r2_tilted_right'] = True
-
-            # If middle finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[11].y < results.right_hand_landmarks.landmark[10].y
-                  and self.previous_gestures['r2_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_deactivated_tilted_right()
-                if self.mode == 1:
-                    Module1.r2_deactivated_tilted_right()
-                if self.mode == 2:
-                    Module2.r2_deactivated_tilted_right()
-                if self.mode == 3:
-                    Module3.r2_deactivated_tilted_right()
-                if self.mode == 4:
-                    Module4.r2_deactivated_tilted_right()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r2_tilted_right'] = False
-
-            # If ring finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[16].y > results.right_hand_landmarks.landmark[13].y
-                    and not self.previous_gestures['r3_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_activated_tilted_right()
-                if self.mode == 1:
-                    Module1.r3_activated_tilted_right()
-                if self.mode == 2:
-                    Module2.r3_activated_tilted_right()
-                if self.mode == 3:
-                    Module3.r3_activated_tilted_right()
-                if self.mode == 4:
-                    Module4.r3_activated_tilted_right()
-
-                # Update the previous state to activated
-                self.previous_gestures['r3_tilted_right'] = True
-
-            # If ring finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[15].y < results.right_hand_landmarks.landmark[14].y
-                  and self.previous_gestures['r3_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_deactivated_tilted_right()
-                if self.mode == 1:
-                    Module1.r3_deactivated_tilted_right()
-                if self.mode == 2:
-                    Module2.r3_deactivated_tilted_right()
-                if self.mode == 3:
-                    Module3.r3_deactivated_tilted_right()
-                if self.mode == 4:
-                    Module4.r3_deactivated_tilted_right()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r3_tilted_right'] = False
-
-            # If pinky's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[20].y > results.right_hand_landmarks.landmark[17].y
-                    and not self.previous_gestures['r4_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_activated_tilted_right()
-                if self.mode == 1:
-                    Module1.r4_activated_tilted_right()
-                if self.mode == 2:
-                    Module2.r4_activated_tilted_right()
-                if self.mode == 3:
-                    Module3.r4_activated_tilted_right()
-                if self.mode == 4:
-                    Module4.r4_activated_tilted_right()
-
-                # Update the previous state to activated
-                self.previous_gestures['r4_tilted_right'] = True
-
-            # If pinky's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[19].y < results.right_hand_landmarks.landmark[18].y
-                  and self.previous_gestures['r4_tilted_right']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_deactivated_tilted_right()
-                if self.mode == 1:
-                    Module1.r4_deactivated_tilted_right()
-                if self.mode == 2:
-                    Module2.r4_deactivated_tilted_right()
-                if self.mode == 3:
-                    Module3.r4_deactivated_tilted_right()
-                if self.mode == 4:
-                    Module4.r4_deactivated_tilted_right()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r4_tilted_right'] = False
-
-        # If right hand tilted left
-        elif results.right_hand_landmarks.landmark[17].x > results.right_hand_landmarks.landmark[0].x:
-            # If thumb's tip horizontally crosses the ring finger base knuckle and previously was not activated
-            if (results.right_hand_landmarks.landmark[4].x < results.right_hand_landmarks.landmark[9].x
-                    and not self.previous_gestures['r0_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_activated_tilted_left()
-                if self.mode == 1:
-                    Module1.r0_activated_tilted_left()
-                if self.mode == 2:
-                    Module2.r0_activated_tilted_left()
-                if self.mode == 3:
-                    Module3.r0_activated_tilted_left()
-                if self.mode == 4:
-                    Module4.r0_activated_tilted_left()
-
-                # Update the previous state to activated
-                self.previous_gestures['r0_tilted_left'] = True
-
-            # If thumb's tip is not over palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[4].x > results.right_hand_landmarks.landmark[5].x
-                  and self.previous_gestures['r0_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_deactivated_tilted_left()
-                if self.mode == 1:
-                    Module1.r0_deactivated_tilted_left()
-                if self.mode == 2:
-                    Module2.r0_deactivated_tilted_left()
-                if self.mode == 3:
-                    Module3.r0_deactivated_tilted_left()
-                if self.mode == 4:
-                    Module4.r0_deactivated_tilted_left()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r0_tilted_left'] = False
-
-            # If index finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[8].y > results.right_hand_landmarks.landmark[5].y
-                    and not self.previous_gestures['r1_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_activated_tilted_left()
-                if self.mode == 1:
-                    Module1.r1_activated_tilted_left()
-                if self.mode == 2:
-                    Module2.r1_activated_tilted_left()
-                if self.mode == 3:
-                    Module3.r1_activated_tilted_left()
-                if self.mode == 4:
-                    Module4.r1_activated_tilted_left()
-
-                # Update the previous state to activated
-                self.previous_gestures['r1_tilted_left'] = True
-
-            # If index finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[7].y < results.right_hand_landmarks.landmark[5].y
-                  and self.previous_gestures['r1_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_deactivated_tilted_left()
-                if self.mode == 1:
-                    Module1.r1_deactivated_tilted_left()
-                if self.mode == 2:
-                    Module2.r1_deactivated_tilted_left()
-                if self.mode == 3:
-                    Module3.r1_deactivated_tilted_left()
-                if self.mode == 4:
-                    Module4.r1_deactivated_tilted_left()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r1_tilted_left'] = False
-
-            # If middle finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[12].y > results.right_hand_landmarks.landmark[9].y
-                    and not self.previous_gestures['r2_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_activated_tilted_left()
-                if self.mode == 1:
-                    Module1.r2_activated_tilted_left()
-                if self.mode == 2:
-                    Module2.r2_activated_tilted_left()
-                if self.mode == 3:
-                    Module3.r2_activated_tilted_left()
-                if self.mode == 4:
-                    Module4.r2_activated_tilted_left()
-
-                # Update the previous state to activated
-                self.previous_gestures['r2_tilted_left'] = True
-
-            # If middle finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[11].y < results.right_hand_landmarks.landmark[10].y
-                  and self.previous_gestures['r2_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_deactivated_tilted_left()
-                if self.mode == 1:
-                    Module1.r2_deactivated_tilted_left()
-                if self.mode == 2:
-                    Module2.r2_deactivated_tilted_left()
-                if self.mode == 3:
-                    Module3.r2_deactivated_tilted_left()
-                if self.mode == 4:
-                    Module4.r2_deactivated_tilted_left()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r2_tilted_left'] = False
-
-            # If ring finger's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[16].y > results.right_hand_landmarks.landmark[13].y
-                    and not self.previous_gestures['r3_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_activated_tilted_left()
-                if self.mode == 1:
-                    Module1.r3_activated_tilted_left()
-                if self.mode == 2:
-                    Module2.r3_activated_tilted_left()
-                if self.mode == 3:
-                    Module3.r3_activated_tilted_left()
-                if self.mode == 4:
-                    Module4.r3_activated_tilted_left()
-
-                # Update the previous state to activated
-                self.previous_gestures['r3_tilted_left'] = True
-
-            # If ring finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[15].y < results.right_hand_landmarks.landmark[14].y
-                  and self.previous_gestures['r3_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_deactivated_tilted_left()
-                if self.mode == 1:
-                    Module1.r3_deactivated_tilted_left()
-                if self.mode == 2:
-                    Module2.r3_deactivated_tilted_left()
-                if self.mode == 3:
-                    Module3.r3_deactivated_tilted_left()
-                if self.mode == 4:
-                    Module4.r3_deactivated_tilted_left()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r3_tilted_left'] = False
-
-            # If pinky's tip is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[20].y > results.right_hand_landmarks.landmark[17].y
-                    and not self.previous_gestures['r4_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_activated_tilted_left()
-                if self.mode == 1:
-                    Module1.r4_activated_tilted_left()
-                if self.mode == 2:
-                    Module2.r4_activated_tilted_left()
-                if self.mode == 3:
-                    Module3.r4_activated_tilted_left()
-                if self.mode == 4:
-                    Module4.r4_activated_tilted_left()
-
-                # Update the previous state to activated
-                self.previous_gestures['r4_tilted_left'] = True
-
-            # If pinky's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[19].y < results.right_hand_landmarks.landmark[18].y
-                  and self.previous_gestures['r4_tilted_left']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_deactivated_tilted_left()
-                if self.mode == 1:
-                    Module1.r4_deactivated_tilted_left()
-                if self.mode == 2:
-                    Module2.r4_deactivated_tilted_left()
-                if self.mode == 3:
-                    Module3.r4_deactivated_tilted_left()
-                if self.mode == 4:
-                    Module4.r4_deactivated_tilted_left()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r4_tilted_left'] = False
-
-        # If hand is not tilted
-        else:
-            # If thumb's knuckle is folded over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[3].x < results.right_hand_landmarks.landmark[5].x
-                    and not self.previous_gestures['r0_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_activated_without_tilt()
-                if self.mode == 1:
-                    Module1.r0_activated_without_tilt()
-                if self.mode == 2:
-                    Module2.r0_activated_without_tilt()
-                if self.mode == 3:
-                    Module3.r0_activated_without_tilt()
-                if self.mode == 4:
-                    Module4.r0_activated_without_tilt()
-
-                # Update the previous state to activated
-                self.previous_gestures['r0_without_tilt'] = True
-
-            # If thumb's tip is not over palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[4].x > results.right_hand_landmarks.landmark[5].x
-                  and self.previous_gestures['r0_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r0_deactivated_without_tilt()
-                if self.mode == 1:
-                    Module1.r0_deactivated_without_tilt()
-                if self.mode == 2:
-                    Module2.r0_deactivated_without_tilt()
-                if self.mode == 3:
-                    Module3.r0_deactivated_without_tilt()
-                if self.mode == 4:
-                    Module4.r0_deactivated_without_tilt()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r0_without_tilt'] = False
-
-            # If index finger's tip is over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[8].y > results.right_hand_landmarks.landmark[5].y
-                    and not self.previous_gestures['r1_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_activated_without_tilt()
-                if self.mode == 1:
-                    Module1.r1_activated_without_tilt()
-                if self.mode == 2:
-                    Module2.r1_activated_without_tilt()
-                if self.mode == 3:
-                    Module3.r1_activated_without_tilt()
-                if self.mode == 4:
-                    Module4.r1_activated_without_tilt()
-
-                # Update the previous state to activated
-                self.previous_gestures['r1_without_tilt'] = True
-
-            # If index finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[7].y < results.right_hand_landmarks.landmark[6].y
-                  and self.previous_gestures['r1_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r1_deactivated_without_tilt()
-                if self.mode == 1:
-                    Module1.r1_deactivated_without_tilt()
-                if self.mode == 2:
-                    Module2.r1_deactivated_without_tilt()
-                if self.mode == 3:
-                    Module3.r1_deactivated_without_tilt()
-                if self.mode == 4:
-                    Module4.r1_deactivated_without_tilt()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r1_without_tilt'] = False
-
-            # If middle finger's tip is over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[12].y > results.right_hand_landmarks.landmark[9].y
-                    and not self.previous_gestures['r2_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_activated_without_tilt()
-                if self.mode == 1:
-                    Module1.r2_activated_without_tilt()
-                if self.mode == 2:
-                    Module2.r2_activated_without_tilt()
-                if self.mode == 3:
-                    Module3.r2_activated_without_tilt()
-                if self.mode == 4:
-                    Module4.r2_activated_without_tilt()
-
-                # Update the previous state to activated
-                self.previous_gestures['r2_without_tilt'] = True
-
-            # If middle finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[11].y < results.right_hand_landmarks.landmark[10].y
-                  and self.previous_gestures['r2_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r2_deactivated_without_tilt()
-                if self.mode == 1:
-                    Module1.r2_deactivated_without_tilt()
-                if self.mode == 2:
-                    Module2.r2_deactivated_without_tilt()
-                if self.mode == 3:
-                    Module3.r2_deactivated_without_tilt()
-                if self.mode == 4:
-                    Module4.r2_deactivated_without_tilt()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r2_without_tilt'] = False
-
-            # If ring finger's tip is over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[16].y > results.right_hand_landmarks.landmark[13].y
-                    and not self.previous_gestures['r3_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_activated_without_tilt()
-                if self.mode == 1:
-                    Module1.r3_activated_without_tilt()
-                if self.mode == 2:
-                    Module2.r3_activated_without_tilt()
-                if self.mode == 3:
-                    Module3.r3_activated_without_tilt()
-                if self.mode == 4:
-                    Module4.r3_activated_without_tilt()
-
-                # Update the previous state to activated
-                self.previous_gestures['r3_without_tilt'] = True
-
-            # If ring finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[16].y < results.right_hand_landmarks.landmark[13].y
-                  and self.previous_gestures['r3_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r3_deactivated_without_tilt()
-                if self.mode == 1:
-                    Module1.r3_deactivated_without_tilt()
-                if self.mode == 2:
-                    Module2.r3_deactivated_without_tilt()
-                if self.mode == 3:
-                    Module3.r3_deactivated_without_tilt()
-                if self.mode == 4:
-                    Module4.r3_deactivated_without_tilt()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r3_without_tilt'] = False
-
-            # If pinky finger's tip is over palm and previously was not activated
-            if (results.right_hand_landmarks.landmark[20].y > results.right_hand_landmarks.landmark[17].y
-                    and not self.previous_gestures['r4_without_tilt']):
-
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_activated_without_tilt()
-                if self.mode == 1:
-                    Module1.r4_activated_without_tilt()
-                if self.mode == 2:
-                    Module2.r4_activated_without_tilt()
-                if self.mode == 3:
-                    Module3.r4_activated_without_tilt()
-                if self.mode == 4:
-                    Module4.r4_activated_without_tilt()
-
-                # Update the previous state to activated
-                self.previous_gestures['r4_without_tilt'] = True
-
-            # If pinky finger's middle segment is angled away from palm and previously was activated
-            elif (results.right_hand_landmarks.landmark[20].y < results.right_hand_landmarks.landmark[17].y
-                  and self.previous_gestures['r4_without_tilt']):
-                
-                # Chooses which module to run given the mode
-                if self.mode == 0:
-                    Module0.r4_deactivated_without_tilt()
-                if self.mode == 1:
-                    Module1.r4_deactivated_without_tilt()
-                if self.mode == 2:
-                    Module2.r4_deactivated_without_tilt()
-                if self.mode == 3:
-                    Module3.r4_deactivated_without_tilt()
-                if self.mode == 4:
-                    Module4.r4_deactivated_without_tilt()
-
-                # Update the previous state to deactivated
-                self.previous_gestures['r4_without_tilt'] = False
+        if rules.mask & self.exit_mask == self.exit_mask:
+            self.stop()
+
+    def detect_right_hand_gestures(self, landmarks):
+        rules = self.right_rules
+
+        # Go through every right hand trigger that changed this frame
+        for index in set_bits(rules.evaluate(landmarks, self.frame_timestamp)):
+            edge = 'activated' if rules.mask >> index & 1 else 'deactivated'
+
+            # Without any modes, as with modules=[], there is nothing to call and the gesture is only logged
+            if self.mode < len(self.dispatch):
+                # Mode 0's module is loaded here if run() did not load it at startup
+                if self.mode in self.dispatch.pending:
+                    self.load_mode(self.mode)
+
+                # Hand the module function for this mode, finger, tilt and edge to the workers,
+                #  keyed by the gesture so its activation and deactivation run in order
+                self.callbacks.submit(index, self.dispatch.rows[self.mode][self.right_slots[index]
+                                                                           + (0 if edge == 'activated' else 1)],
+                                      self.frame_captured_at, edge)
+
+            rule = rules.rules[index]
+            self.emit_event('gesture', 'right', rule.finger, rule.tilt, edge)
+
+    # Make sure a mode's module is loaded and in the dispatch table, and prefetch the modes next to it
+    def load_mode(self, mode):
+        if mode in self.dispatch.pending:
+            self.dispatch.set_module(mode, self.modules.load(mode))
+        self.modules.prefetch_around(mode)
+
+    # Put the functions of reloaded modules in the dispatch table, called between frames
+    def swap_reloaded_modules(self):
+        while self.modules.reloads:
+            mode, module = self.modules.reloads.popleft()
+            self.dispatch.set_module(mode, module)
+
+    # Log a hand, gesture or mode change and publish it to the event subscribers
+    def emit_event(self, kind, hand, finger=None, tilt=None, edge=None):
+        if self.first_gesture_time is None:
+            self.first_gesture_time = time.perf_counter() - STARTED_AT
+        self.event_log.record(kind, self.frame_timestamp, hand, finger, tilt, edge, self.mode)
+        if self.events.subscriptions:
+            self.events.publish(GestureEvent(self.frame_timestamp, kind, hand, finger, tilt, edge, self.mode))
+
+    # Edges the debounce settings held back, by kind
+    def debounce_stats(self):
+        return {'left_gestures': self.left_rules.suppressed, 'right_gestures': self.right_rules.suppressed,
+                'hand_losses': self.suppressed_hand_losses}
+
+    # Latency histograms of every step, plus the callback queue wait and capture to callback time
+    def latency_stats(self):
+        histograms = dict(self.latency)
+        histograms.update(self.callbacks.latency())
+        return histograms
+
+    def latency_report(self):
+        return latency_report(self.latency_stats())
+
+    # Ask the camera loop to finish, this is safe to call from any thread
+    def stop(self):
+        self.stop_requested.set()
 
     def run(self):
 
-        # Start capturing video from given source
-        cap = cv2.VideoCapture(0)
-
-        # Set mediapipe model with high confidence of 0.9 or greater
-        with self.mp_holistic.Holistic(min_detection_confidence=0.9, min_tracking_confidence=0.9) as holistic:
-
-            # Loop through every frame
-            while cap.isOpened():
+        # Stop cleanly on Ctrl+C or a termination signal, which also works without a preview window
+        previous_handlers = self.handle_signals()
+
+        # Everything opened from here on is released by shut_down(), even if something fails part way
+        self.cap = None
+        try:
+            # Start capturing video from given source, a camera keeps only the newest frame,
+            #  while the model is built and mode 0's module is loaded
+            self.cap, backend = self.start_up()
+
+            with backend:
+                self.backend = backend
+
+                # Reload modules whose files change, without restarting the camera or the model
+                if self.reload_interval:
+                    self.modules.watch(self.reload_interval)
+
+                # Record the landmarks of every frame if asked to
+                if self.record_path:
+                    self.recorder = TraceRecorder(self.record_path)
+
+                # Publish the landmarks of every frame to other processes if asked to
+                if self.share_name:
+                    self.shared_landmarks = LandmarkRingWriter(self.share_name)
+                    print(f'sharing landmarks in shared memory {self.shared_landmarks.name}')
+
+                # Each step of the loop runs as its own stage so they overlap on different frames.
+                # Without a preview there is no render stage at all.
+                stages = [('preprocess', self.convert_frame),
+                          ('inference', self.find_landmarks),
+                          ('gesture', self.handle_landmarks)]
+                if self.preview.mode != 'off':
+                    stages.append(('render', self.show_frame))
+
+                # A slow window drops preview frames instead of holding up gesture detection
+                self.pipeline = Pipeline(self.read_frame, stages, queue_size=self.queue_size,
+                                         stop_event=self.stop_requested, lossy=('render',))
+                self.pipeline.run()
+        finally:
+            subscriber_stats = self.shut_down(previous_handlers)
+
+        self.print_reports(subscriber_stats)
+
+    # Release the source, the trace, the shared memory, the workers, the event log and the preview window
+    #  and restore the signal handlers, whichever of them run() got to.
+    # Returns the stats of the event subscribers from before they were closed.
+    def shut_down(self, previous_handlers):
+        try:
+            # A shared memory block outlives the process unless it is removed
+            if self.shared_landmarks is not None:
+                self.shared_landmarks.close()
+            if self.recorder is not None:
+                self.recorder.close()
+
+            # Release the video capture object
+            if self.cap is not None:
+                self.cap.release()
+
+            # Let the module functions already queued finish
+            self.callbacks.shutdown()
+            self.modules.close()
+
+            # Deliver the events still queued for subscribers and write out what is left of the event log
+            subscriber_stats = self.events.stats()
+            self.events.close()
+            self.event_log.close()
 
-                # Read the frame
-                ret, frame = cap.read()
-                if not ret:
-                    break
+            # Destroy all the windows
+            self.preview.close()
+        finally:
+            for signal_number, handler in previous_handlers.items():
+                signal.signal(signal_number, handler)
+        return subscriber_stats
+
+    # Print how the run went, after shut_down() so every callback and event is counted
+    def print_reports(self, subscriber_stats):
+        if self.recorder is not None:
+            print(f'recorded {self.recorder.frames} frames to {self.record_path}')
+        if self.cap.live:
+            print(f'skipped {self.cap.dropped_frames} of {self.cap.captured_frames} frames to stay on the newest frame')
+
+        # Show how fast each stage ran
+        print(self.pipeline.report())
+
+        # Show how often hand ROI could crop and how often the crop box moved under the model's tracking
+        if self.preprocessor.hand_roi:
+            frames = self.preprocessor.cropped_frames + self.preprocessor.full_frames
+            print(f'hand ROI cropped {self.preprocessor.cropped_frames} of {frames} frames, '
+                  f'tracking restarted {self.backend.restarts} times')
+
+        # Show how long starting up and every module that was used took to load
+        if self.startup_time is not None:
+            print(self.startup_report())
+        print(self.modules.report())
+
+        # Show how long frames and module functions took from capture, once every callback has run
+        print(self.latency_report())
+
+        # Show how many flickering edges debouncing kept from the modules
+        if (self.left_rules.debounced or self.right_rules.debounced or self.left_loss_frames > 1
+                or self.right_loss_frames > 1):
+            stats = self.debounce_stats()
+            print(f'debouncing suppressed {stats["left_gestures"]} left and {stats["right_gestures"]} right hand '
+                  f'gesture edges and {stats["hand_losses"]} hand losses')
+
+        # Show how long the interface sat idle
+        if self.governor is not None:
+            stats = self.governor.stats()
+            print(f'active for {stats["active_time"]:.1f}s, idle for {stats["idle_time"]:.1f}s, '
+                  f'skipped {stats["skipped_frames"]} frames while idle')
+
+        for stats in subscriber_stats:
+            if stats['dropped']:
+                print(f'event subscriber {stats["subscriber"]} fell behind and dropped {stats["dropped"]} events')
+        if self.event_log.dropped:
+            print(f'event log fell behind and dropped {self.event_log.dropped} events')
+
+    # Open the source, build the model and load mode 0's module on their own threads, since each can take seconds.
+    # Returns the opened source and the backend, or raises the first error after closing whatever did open.
+    def start_up(self):
+        with concurrent.futures.ThreadPoolExecutor(3, thread_name_prefix='startup') as startup:
+            camera = startup.submit(self.timed_step, 'camera', open_source, self.source)
+            model = startup.submit(self.build_backend)
+            modules = startup.submit(self.timed_step, 'modules', self.load_mode, 0) if len(self.dispatch) else None
+
+        errors = [future.exception() for future in (camera, model, modules)
+                  if future is not None and future.exception() is not None]
+        if errors:
+            if camera.exception() is None:
+                camera.result().release()
+            if model.exception() is None:
+                model.result().close()
+            raise errors[0]
+        return camera.result(), model.result()
+
+    # Run one startup step and keep how long it took
+    def timed_step(self, name, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.startup_steps[name] = time.perf_counter() - started
+        return result
+
+    # Build the landmark model with high confidence of 0.9 or greater, then run it once on a blank image,
+    #  so the first real frame does not also pay for mediapipe's one-time setup
+    def build_backend(self):
+        # With hand ROI, crops and whole frames go to separate models in the backend
+        options = {'hand_roi': True} if self.preprocessor.hand_roi else {}
+        backend = self.timed_step('model', create_backend, self.backend_name, min_detection_confidence=0.9,
+                                  min_tracking_confidence=0.9, **options)
+        try:
+            started = time.perf_counter()
+            width = self.preprocessor.inference_width or 640
+            blank = np.zeros((width * 3 // 4, width, 3), dtype=np.uint8)
+            backend.process(blank)
+            if self.preprocessor.hand_roi:
+                backend.process(blank, (0.0, 0.0, 1.0, 1.0))
+            self.startup_steps['warm_up'] = time.perf_counter() - started
+        except BaseException:
+            backend.close()
+            raise
+        return backend
+
+    # How long starting up took, as readable text
+    def startup_report(self):
+        steps = ', '.join(f'{name.replace("_", "-")} {self.startup_steps[name]:.2f}s'
+                          for name in ('camera', 'model', 'warm_up', 'modules') if name in self.startup_steps)
+        text = f'first frame {self.startup_time:.2f}s after starting ({steps})'
+        if self.first_gesture_time is not None:
+            text += f', first gesture after {self.first_gesture_time:.2f}s'
+        return text
+
+    # Make SIGINT and SIGTERM call stop() and SIGUSR1 print the latency report, returns the handlers they had before
+    def handle_signals(self):
+        previous_handlers = {}
+
+        # Signal handlers can only be set from the main thread
+        if threading.current_thread() is not threading.main_thread():
+            return previous_handlers
+
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signal_number] = signal.signal(signal_number, lambda number, frame: self.stop())
+
+        # Not available on Windows
+        if hasattr(signal, 'SIGUSR1'):
+            previous_handlers[signal.SIGUSR1] = signal.signal(signal.SIGUSR1,
+                                                              lambda number, frame: print(self.latency_report()))
+        return previous_handlers
+
+    # Capture stage, waits for the newest frame
+    def read_frame(self):
+        while self.cap.isOpened() and not self.stop_requested.is_set():
+            ret, frame, timestamp = self.cap.read(timeout=0.1)
+            if ret:
+                self.frames_read += 1
+
+                # Show how long it took from starting the program until the first frame
+                if self.frames_read == 1:
+                    self.startup_time = time.perf_counter() - STARTED_AT
+                    print(self.startup_report())
+
+                # A camera frame's timestamp is when it was captured, a recording's is its position in the file
+                captured_at = timestamp if self.cap.live else time.perf_counter()
+                return FramePacket(self.frames_read, captured_at, timestamp, frame)
+        return None
+
+    # Preprocess stage
+    def convert_frame(self, packet):
+        # Skip the frame while idle and it is too soon for the next inference
+        if self.governor is not None and not self.governor.should_process(packet.captured_at):
+            return None
+
+        # Shrink or crop the frame and convert it to RGB
+        packet.image, packet.crop = self.preprocessor.prepare(packet.frame)
+
+        packet.preprocessed_at = time.perf_counter()
+        self.latency['preprocess'].record(packet.preprocessed_at - packet.captured_at)
+        return packet
+
+    # Inference stage
+    def find_landmarks(self, packet):
+        # Pass the image to mediapipe, with hand ROI along with the crop it was cut from
+        if self.preprocessor.hand_roi:
+            packet.results = self.backend.process(packet.image, packet.crop)
+        else:
+            packet.results = self.backend.process(packet.image)
 
-                # Convert the frame to RGB
-                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        # Put cropped landmarks back in full frame coordinates and remember where the hands are
+        self.preprocessor.restore(packet.results, packet.crop)
+        self.preprocessor.track(packet.results)
 
-                # Pass the image to mediapipe
-                results = holistic.process(image)
+        # Go idle or back to full rate depending on whether a hand was found
+        if self.governor is not None:
+            self.governor.update(packet.results.left_hand_landmarks is not None
+                                 or packet.results.right_hand_landmarks is not None, packet.captured_at)
 
-                # Now pass the results to detect_gesture
-                self.check_if_active(results)  # Pass 'results' as an argument here
+        packet.inferred_at = time.perf_counter()
+        self.latency['inference'].record(packet.inferred_at - packet.preprocessed_at)
+        return packet
 
-                # Draw the hand landmarks
-                self.mp_drawing.draw_landmarks(frame, results.right_hand_landmarks, self.mp_holistic.HAND_CONNECTIONS)
-                self.mp_drawing.draw_landmarks(frame, results.left_hand_landmarks, self.mp_holistic.HAND_CONNECTIONS)
+    # Gesture stage, runs the gesture logic and hands module functions to the workers
+    def handle_landmarks(self, packet):
+        self.frame_timestamp = packet.timestamp
+        self.frame_captured_at = packet.captured_at
 
-                # Show the frame
-                cv2.imshow('Gesture Control Interface', frame)
+        # Record the landmarks exactly as the gesture logic gets them
+        if self.recorder is not None:
+            self.recorder.write(packet.timestamp, packet.results, packet.sequence)
+        if self.shared_landmarks is not None:
+            self.shared_landmarks.write(packet.timestamp, packet.results)
 
-                # Break the loop if 'q' is pressed
-                if cv2.waitKey(1) == ord('q'):
-                    break
+        # Now pass the results to detect_gesture
+        self.check_if_active(packet.results)
 
-        # Release the video capture object
-        cap.release()
+        evaluated_at = time.perf_counter()
+        self.latency['gesture'].record(evaluated_at - packet.inferred_at)
+        self.latency['frame'].record(evaluated_at - packet.captured_at)
+        return packet
 
-        # Destroy all the windows
-        cv2.destroyAllWindows()
+    # Render stage
+    def show_frame(self, packet):
+        if not self.preview.show(packet.frame, packet.results, packet.captured_at):
+            self.stop()
 
 
 # Set gesture interface class and run
-gesture_interface = GestureControlInterface()
-gesture_interface.run()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Control your computer with hand gestures.')
+    parser.add_argument('--source', default='0', help='camera index, video file or directory of images (default: 0)')
+    parser.add_argument('--offline', action='store_true',
+                        help='process a video file or image directory as fast as possible, without a preview, '
+                             'idle mode or module functions, use with --events')
+    parser.add_argument('--events', metavar='FILE', help='write every hand, gesture and mode change as JSON lines')
+    parser.add_argument('--serve', metavar='SOCKET',
+                        help='stream every hand, gesture and mode change to other programs over a Unix domain socket')
+    parser.add_argument('--modules', metavar='CONFIG', default=DEFAULT_CONFIG,
+                        help='config file mapping modes to modules (default: modules.json)')
+    parser.add_argument('--reload', action='store_true',
+                        help='reload a module when its file changes, without restarting the camera or the model')
+    parser.add_argument('--reload-interval', type=float, default=1.0,
+                        help='seconds between checks of the module files with --reload (default: 1)')
+    parser.add_argument('--backend', default='holistic', choices=list(BACKENDS),
+                        help="landmark model, 'hands' is cheaper (default: holistic)")
+    parser.add_argument('--inference-width', type=int, default=640,
+                        help='width frames are shrunk to before inference (default: 640)')
+    parser.add_argument('--hand-roi', action='store_true',
+                        help='only send the area around tracked hands to the model, needs --backend hands')
+    parser.add_argument('--headless', action='store_true', help='run without a preview window, stop with Ctrl+C')
+    parser.add_argument('--preview', default='always', choices=['always', 'hands'],
+                        help="show every frame or only frames with hands (default: always)")
+    parser.add_argument('--preview-fps', type=float, default=None, help='most frames per second to show')
+    parser.add_argument('--smooth', action='store_true',
+                        help='smooth landmark jitter with a One Euro filter so gestures do not flicker')
+    parser.add_argument('--smooth-min-cutoff', type=float, default=0.05,
+                        help='smoothing of a still hand, lower is smoother (default: 0.05)')
+    parser.add_argument('--smooth-beta', type=float, default=80.0,
+                        help='how fast smoothing drops as a hand moves, higher reacts faster (default: 80)')
+    parser.add_argument('--debounce-frames', type=int, default=1,
+                        help='frames in a row a gesture has to hold before it activates or deactivates (default: 1)')
+    parser.add_argument('--debounce-hold', type=float, default=0.0,
+                        help='seconds a gesture has to hold before it activates or deactivates (default: 0)')
+    parser.add_argument('--hand-loss-frames', type=int, default=1,
+                        help='frames in a row a hand has to be missing before it is deactivated (default: 1)')
+    parser.add_argument('--record', metavar='TRACE', help="record every frame's hand landmarks to a trace file")
+    parser.add_argument('--share-landmarks', metavar='NAME',
+                        help="publish every frame's hand landmarks in a shared memory block for other processes")
+    parser.add_argument('--replay', metavar='TRACE', help='replay a recorded trace instead of using the camera')
+    parser.add_argument('--realtime', action='store_true', help='replay at the recorded pace instead of full speed')
+    parser.add_argument('--log', metavar='FILE', help='write the event log to a file instead of the console')
+    parser.add_argument('--log-format', default='text', choices=list(FORMATS),
+                        help='event log as readable lines or JSON lines (default: text)')
+    parser.add_argument('--log-categories', nargs='*', default=list(CATEGORIES), choices=list(CATEGORIES),
+                        help='events to log, none turns the log off (default: all)')
+    args = parser.parse_args()
+    log_options = {'log_path': args.log, 'log_format': args.log_format, 'log_categories': args.log_categories}
+
+    # Smoothing and debouncing, the same for both hands and every gesture
+    gesture_debounce = Debounce(args.debounce_frames, args.debounce_frames, args.debounce_hold)
+    hand_debounce = Debounce(deactivate_frames=args.hand_loss_frames)
+    filter_options = {'smoothing': args.smooth, 'smooth_min_cutoff': args.smooth_min_cutoff,
+                      'smooth_beta': args.smooth_beta,
+                      'debounce': {'left': gesture_debounce, 'right': gesture_debounce,
+                                   'left_hand': hand_debounce, 'right_hand': hand_debounce}}
+
+    # Replay runs module functions right away so the same trace always gives the same output
+    if args.replay:
+        gesture_interface = GestureControlInterface(callback_workers=0, module_config=args.modules, **log_options,
+                                                    **filter_options)
+        server = EventServer(args.serve, gesture_interface.events) if args.serve else None
+        frames = replay_trace(gesture_interface, TraceReplay(args.replay), args.realtime)
+        gesture_interface.modules.close()
+        gesture_interface.event_log.close()
+        if server is not None:
+            server.close()
+        print(f'replayed {frames} frames from {args.replay}')
+        print(gesture_interface.modules.report())
+
+    else:
+        if args.hand_roi and not BACKENDS[args.backend].supports_hand_roi:
+            parser.error(f"--hand-roi does not work with the {args.backend!r} backend, use --backend hands")
+        if args.offline and args.source.isdigit():
+            parser.error('--offline needs a video file or a directory of images as --source')
+
+        # Offline runs every frame through the gesture logic but leaves the modules alone
+        gesture_interface = GestureControlInterface(modules=[None] * len(read_config(args.modules)[0])
+                                                    if args.offline else None, module_config=args.modules,
+                                                    backend=args.backend, inference_width=args.inference_width,
+                                                    hand_roi=args.hand_roi,
+                                                    idle_rate=None if args.offline else 5.0,
+                                                    preview='off' if args.headless or args.offline else args.preview,
+                                                    preview_fps=args.preview_fps, record=args.record,
+                                                    share_landmarks=args.share_landmarks, source=args.source,
+                                                    reload_interval=args.reload_interval if args.reload else None,
+                                                    **log_options, **filter_options)
+
+        # Write the gesture event stream
+        if args.events:
+            events_file = open(args.events, 'w')
+            gesture_interface.events.subscribe(lambda event: events_file.write(json.dumps(event.as_dict()) + '\n'),
+                                               inline=True, name='events-file')
+
+        # Stream events to other programs
+        server = EventServer(args.serve, gesture_interface.events) if args.serve else None
+
+        try:
+            gesture_interface.run()
+        finally:
+            if server is not None:
+                server.close()
+            if args.events:
+                events_file.close()
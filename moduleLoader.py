@@ -0,0 +1,289 @@
+"""
+Loads the gesture modules of each mode from a config file, each one only when it is first needed.
+
+Importing a module can be slow, it may pull in large packages or connect to something at import time,
+ and with every module imported at startup all of that was paid before the camera even opened,
+ for modes that may never be selected.
+Now the config file only says which module each mode uses, and a module is imported the first time
+ the left hand selects its mode.
+Mode 0 is selected at startup, so its module is the only one loaded right away.
+
+The config file is JSON, modules.json next to main.py by default:
+
+    {
+        "modes": {
+            "0": "basicInterfaceV1_mod",
+            "1": "customMod1",
+            "2": "myModules/lights.py"
+        },
+        "prefetch": true
+    }
+
+Each mode maps to an importable module name, or to the path of a .py file, relative to the config file.
+Modes left out, or mapped to null, have no module and do nothing, and the left hand selects modes 0 to 4.
+With prefetch on, selecting a mode also loads the modes next to it on a background thread,
+ so switching one finger over is usually ready by the time it is selected.
+
+How long each module took to load is kept in load_times, in seconds.
+A module that fails to import is reported and its mode does nothing, the interface keeps running.
+
+With watch() a background thread checks the modification time of every loaded module's file,
+ and when one changes it runs the file again as a new module object and puts it in reloads.
+The interface swaps reloaded modules into its dispatch table between frames, so a frame never mixes
+ the functions of two versions, and functions already queued finish with the version they were queued with.
+A module that fails to reload is reported and the version before it stays in use until the file changes again.
+Module level state, such as a connection made at import time, starts over in the new version.
+"""
+
+import importlib
+import importlib.util
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+# Config read when no other is given
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules.json')
+
+
+# Read a module config file, returns (module path of each mode with None for modes without one, prefetch)
+def read_config(path=DEFAULT_CONFIG):
+    with open(path) as file:
+        config = json.load(file)
+
+    try:
+        modes = {int(mode): module for mode, module in config['modes'].items()}
+    except (KeyError, AttributeError, ValueError):
+        raise ValueError(f'{path} needs a "modes" object mapping mode numbers to modules') from None
+    if not modes:
+        raise ValueError(f'{path} maps no modes to modules, give at least mode 0')
+    if any(mode < 0 for mode in modes):
+        raise ValueError(f'{path} has a negative mode number')
+
+    # Paths of .py files are relative to the config file
+    base = os.path.dirname(os.path.abspath(path))
+    paths = [None] * (max(modes) + 1)
+    for mode, module in modes.items():
+        if module and module.endswith('.py'):
+            module = os.path.join(base, module)
+        paths[mode] = module or None
+
+    return paths, bool(config.get('prefetch', False))
+
+
+# Import a module by name, or from a .py file by path
+def import_module(path):
+    if not path.endswith('.py'):
+        return importlib.import_module(path)
+    return run_file(os.path.splitext(os.path.basename(path))[0], path)
+
+
+# Run a .py file as a new module object, without touching the module already loaded from it
+def run_file(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None:
+        raise ImportError(f'cannot load a module from {path}')
+    module = importlib.util.module_from_spec(spec)
+
+    # Compiled from the source every time, a cached .pyc can miss an edit made within the same second
+    with open(path, 'rb') as file:
+        code = compile(file.read(), path, 'exec')
+    exec(code, module.__dict__)
+    return module
+
+
+# The .py file a module was loaded from, or would be for a module that failed to import, None if there is none
+def module_file(module, path):
+    if module is not None:
+        path = getattr(module, '__file__', None)
+    elif not path.endswith('.py'):
+        try:
+            spec = importlib.util.find_spec(path)
+        except (ImportError, ValueError):
+            return None
+        path = spec.origin if spec is not None else None
+    return path if path and path.endswith('.py') else None
+
+
+# Modification time of a file in nanoseconds, None if it cannot be read right now
+def modified_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ModuleLoader:
+    # entries holds one item per mode, a module name or .py path to load when needed,
+    #  or a module object or None that is used as it is
+    def __init__(self, entries, prefetch=False):
+        self.paths = [entry if isinstance(entry, str) else None for entry in entries]
+        self.modules = [None if isinstance(entry, str) else entry for entry in entries]
+        self.loaded = [not isinstance(entry, str) for entry in entries]
+        self.prefetch = prefetch
+
+        # Seconds each loaded module took to import, by mode, and which ones the background thread loaded
+        self.load_times = {}
+        self.prefetched = set()
+        self.failed = set()
+
+        # File and modification time of every loaded module, by mode, for watch()
+        self.files = {}
+        self.modified = {}
+
+        # (mode, module) of every reload not yet swapped in by the interface, and how many there were
+        self.reloads = deque()
+        self.reload_count = 0
+        self.reload_failures = 0
+        self.watching = threading.Event()
+        self.watcher = None
+
+        # One lock per mode, so a mode being prefetched is not imported a second time when it is selected
+        self.locks = [threading.Lock() for _ in entries]
+
+        # Modes waiting to be prefetched, loaded one after another by a single background thread
+        self.queue = None
+        self.thread = None
+        if prefetch:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self.prefetch_loop, name='module-prefetch', daemon=True)
+            self.thread.start()
+
+    @classmethod
+    def from_config(cls, path=DEFAULT_CONFIG):
+        paths, prefetch = read_config(path)
+        return cls(paths, prefetch)
+
+    # Number of modes
+    def __len__(self):
+        return len(self.modules)
+
+    # Short name of a mode's module for reports
+    def name(self, mode):
+        if self.paths[mode] is not None:
+            return os.path.splitext(os.path.basename(self.paths[mode]))[0]
+        module = self.modules[mode]
+        return getattr(module, '__name__', 'none') if module is not None else 'none'
+
+    # The module of a mode, imported now if it was not yet, None if it has none or failed to import
+    def load(self, mode, prefetched=False):
+        if self.loaded[mode]:
+            return self.modules[mode]
+
+        with self.locks[mode]:
+            # Loaded by another thread while this one waited
+            if self.loaded[mode]:
+                return self.modules[mode]
+
+            started = time.perf_counter()
+            try:
+                module = import_module(self.paths[mode])
+            except Exception:
+                print(f'failed to load module {self.paths[mode]!r} for mode {mode}, the mode will do nothing')
+                traceback.print_exc()
+                module = None
+                self.failed.add(mode)
+            else:
+                self.load_times[mode] = time.perf_counter() - started
+                if prefetched:
+                    self.prefetched.add(mode)
+
+            # Watch the file even if it failed, so fixing it loads it
+            path = module_file(module, self.paths[mode])
+            if path is not None:
+                self.files[mode] = path
+                self.modified[mode] = modified_time(path)
+
+            self.modules[mode] = module
+            self.loaded[mode] = True
+            return module
+
+    # Load the modes next to mode in the background
+    def prefetch_around(self, mode):
+        if self.queue is None:
+            return
+        for neighbour in (mode + 1, mode - 1):
+            if 0 <= neighbour < len(self) and not self.loaded[neighbour]:
+                self.queue.put(neighbour)
+
+    def prefetch_loop(self):
+        while True:
+            mode = self.queue.get()
+            if mode is None:
+                return
+            self.load(mode, prefetched=True)
+
+    # Check the files of loaded modules for changes every interval seconds, on a background thread
+    def watch(self, interval=1.0):
+        if self.watcher is not None:
+            return
+        self.watching.clear()
+        self.watcher = threading.Thread(target=self.watch_loop, args=(interval,), name='module-watcher', daemon=True)
+        self.watcher.start()
+
+    def watch_loop(self, interval):
+        while not self.watching.wait(interval):
+            for mode in list(self.files):
+                modified = modified_time(self.files[mode])
+                if modified is not None and modified != self.modified[mode]:
+                    self.reload(mode, modified)
+
+    # Run a changed module's file again as a new module and queue it to be swapped in,
+    #  returns False and keeps the old version if it fails
+    def reload(self, mode, modified=None):
+        path = self.files[mode]
+        with self.locks[mode]:
+            # Whatever happens, this version of the file is not tried again
+            self.modified[mode] = modified if modified is not None else modified_time(path)
+
+            old = self.modules[mode]
+            name = old.__name__ if old is not None else self.name(mode)
+            started = time.perf_counter()
+            try:
+                module = run_file(name, path)
+            except Exception:
+                print(f'failed to reload module {self.name(mode)} for mode {mode}, keeping the version before it')
+                traceback.print_exc()
+                self.reload_failures += 1
+                return False
+
+            # Later imports of a module loaded by name get the new version too
+            if old is not None and sys.modules.get(name) is old:
+                sys.modules[name] = module
+
+            self.modules[mode] = module
+            self.failed.discard(mode)
+            self.load_times[mode] = time.perf_counter() - started
+            self.reload_count += 1
+            self.reloads.append((mode, module))
+        print(f'reloaded module {self.name(mode)} for mode {mode} in {self.load_times[mode] * 1000:.1f} ms')
+        return True
+
+    # Stop the prefetch and watcher threads, a load they are in the middle of finishes first
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.watcher is not None:
+            self.watching.set()
+            self.watcher.join()
+            self.watcher = None
+
+    # Load time of every module loaded so far as readable text
+    def report(self):
+        if not self.load_times and not self.failed:
+            return 'no modules loaded'
+        parts = []
+        for mode in sorted(self.load_times):
+            note = ', prefetched' if mode in self.prefetched else ''
+            parts.append(f'mode {mode} {self.name(mode)} {self.load_times[mode] * 1000:.1f} ms{note}')
+        parts += [f'mode {mode} {self.name(mode)} failed' for mode in sorted(self.failed)]
+        text = 'module load times: ' + ', '.join(parts)
+        if self.reload_count or self.reload_failures:
+            text += f', {self.reload_count} reloads, {self.reload_failures} failed'
+        return text
@@ -0,0 +1,201 @@
+"""
+Runs the steps of the camera loop as a pipeline of stages on separate threads.
+
+Each stage takes a FramePacket from the stage before it, works on it and passes it on
+ through a small bounded queue, so while one frame is in inference the next one is being converted
+ and the previous one is being drawn.
+The first stage produces the packets and the last stage runs on the thread that called run(),
+ since window calls such as cv2.imshow are only safe there on some platforms.
+When a stage fails the whole pipeline stops, and run() raises the first error once every stage has finished,
+ whichever thread it happened on.
+
+A stage can be lossy, like the preview, which is only for watching: the stage before it never waits
+ for room in its queue, and a packet that comes while the queue is full is dropped for that stage only.
+
+Every stage counts how many frames it handled and how long it spent on them,
+ so the slowest stage, the bottleneck, is easy to spot in the report.
+"""
+
+import queue
+import threading
+import time
+
+# Put in a queue after the last packet to tell the next stage to finish
+STOP = object()
+
+
+# One frame on its way through the pipeline.
+# captured_at is when it was captured by this process, timestamp is its time in the source,
+#  which is the same for a camera and the position in the recording for a file.
+# preprocessed_at and inferred_at are when those stages finished with it, for the latency histograms.
+class FramePacket:
+    __slots__ = ('sequence', 'captured_at', 'timestamp', 'frame', 'image', 'crop', 'results', 'preprocessed_at',
+                 'inferred_at')
+
+    def __init__(self, sequence, captured_at, timestamp, frame):
+        self.sequence = sequence
+        self.captured_at = captured_at
+        self.timestamp = timestamp
+        self.frame = frame
+        self.image = None
+        self.crop = None
+        self.results = None
+        self.preprocessed_at = None
+        self.inferred_at = None
+
+
+class Stage:
+    def __init__(self, name, work, queue_size, lossy=False):
+        self.name = name
+        self.work = work
+        self.input = queue.Queue(queue_size)
+        self.lossy = lossy
+
+        # Packets dropped because the queue was full, only changed by the stage before
+        self.dropped = 0
+
+        # Counters, only changed by the stage's own thread
+        self.processed = 0
+        self.busy_time = 0.0
+        self.max_latency = 0.0
+        self.wait_time = 0.0
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, started, finished):
+        latency = finished - started
+        self.processed += 1
+        self.busy_time += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def stats(self):
+        elapsed = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return {
+            'stage': self.name,
+            'frames': self.processed,
+            'fps': self.processed / elapsed if elapsed > 0 else 0.0,
+            'mean_latency': self.busy_time / self.processed if self.processed else 0.0,
+            'max_latency': self.max_latency,
+            'utilization': self.busy_time / elapsed if elapsed > 0 else 0.0,
+            'mean_wait': self.wait_time / self.processed if self.processed else 0.0,
+            'dropped': self.dropped,
+        }
+
+
+class Pipeline:
+    # source returns the next packet or None when there are no more,
+    #  stages is a list of (name, work) where work returns the packet to pass on or None to drop it,
+    #  lossy holds the names of stages that drop packets instead of holding up the stage before them
+    def __init__(self, source, stages, queue_size=2, stop_event=None, lossy=()):
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.stages = [Stage('capture', source, 1)] + [Stage(name, work, queue_size, name in lossy)
+                                                       for name, work in stages]
+
+        # First error raised by any stage, raised again by run()
+        self.error = None
+        self.error_lock = threading.Lock()
+
+    def stop(self):
+        self.stop_event.set()
+
+    # Run until the source runs out or stop() is called
+    def run(self):
+        threads = [threading.Thread(target=self.run_stage, args=(index,), name=f'{stage.name}-stage', daemon=True)
+                   for index, stage in enumerate(self.stages[:-1])]
+        for thread in threads:
+            thread.start()
+
+        # The last stage runs here
+        try:
+            self.run_stage(len(self.stages) - 1)
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join()
+
+        # A stage on another thread failed, so the run ended early
+        if self.error is not None:
+            raise self.error
+
+    def run_stage(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        stage.started_at = time.perf_counter()
+
+        try:
+            while True:
+                # The first stage makes packets until it runs out or is stopped
+                if index == 0:
+                    if self.stop_event.is_set():
+                        break
+                    started = time.perf_counter()
+                    packet = stage.work()
+                    if packet is None:
+                        break
+
+                # Other stages take packets from the stage before, until it says it is done
+                else:
+                    waited = time.perf_counter()
+                    item = stage.input.get()
+                    if item is STOP:
+                        break
+
+                    # Once stopped, packets still on their way are dropped
+                    if self.stop_event.is_set():
+                        continue
+
+                    started = time.perf_counter()
+                    stage.wait_time += started - waited
+                    packet = stage.work(item)
+
+                stage.record(started, time.perf_counter())
+
+                if packet is not None and next_stage is not None:
+                    self.forward(next_stage, packet)
+
+        # A failing stage stops the whole pipeline
+        except BaseException as error:
+            with self.error_lock:
+                if self.error is None:
+                    self.error = error
+            self.stop()
+
+            # The last stage is on the calling thread already, the others leave it to run()
+            if next_stage is None:
+                raise
+
+        finally:
+            stage.finished_at = time.perf_counter()
+
+            # Tell the next stage there is nothing more coming
+            if next_stage is not None:
+                self.forward(next_stage, STOP)
+
+    # Wait for room in the next stage's queue, giving up if that stage has already finished.
+    # A lossy stage gets the packet only if there is room right away, STOP always waits so it is never lost.
+    def forward(self, next_stage, item):
+        if next_stage.lossy and item is not STOP:
+            try:
+                next_stage.input.put_nowait(item)
+            except queue.Full:
+                next_stage.dropped += 1
+            return
+
+        while next_stage.finished_at is None:
+            try:
+                next_stage.input.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def stats(self):
+        return [stage.stats() for stage in self.stages]
+
+    def report(self):
+        lines = [f'{"stage":<12}{"frames":>8}{"fps":>8}{"mean ms":>10}{"max ms":>10}{"busy":>7}{"wait ms":>10}'
+                 f'{"dropped":>9}']
+        for stats in self.stats():
+            lines.append(f'{stats["stage"]:<12}{stats["frames"]:>8}{stats["fps"]:>8.1f}'
+                         f'{stats["mean_latency"] * 1000:>10.2f}{stats["max_latency"] * 1000:>10.2f}'
+                         f'{stats["utilization"]:>7.0%}{stats["mean_wait"] * 1000:>10.2f}{stats["dropped"]:>9}')
+        return '\n'.join(lines)
@@ -0,0 +1,165 @@
+"""
+Prepares camera frames for the landmark backend.
+
+The frame is shrunk to the inference width, keeping its aspect ratio, no matter what the camera or the
+ preview window use, since the gesture logic never needs more pixels than that.
+The shrunk RGB image is written into buffers made once and reused, instead of a new image every frame.
+
+With hand ROI on, once a hand is being tracked only the area around the hands' last landmarks is sent
+ to the backend, grown by a margin so a moving hand stays inside it.
+The crop box stays where it is while every tracked landmark is inside it by at least the inner margin,
+ and is only moved once a hand gets close to its edge, so the model sees the same view frame after frame.
+The landmarks found in that crop are mapped back to full frame coordinates before the gesture logic
+ sees them, so nothing after the backend knows a crop was used.
+Every few frames the whole frame is used again so a hand entering the scene is still found.
+A crop is shrunk to the inference width like a whole frame, but a crop narrower than that is used as it is.
+Only the Hands backend can be given these crops, it tracks the hands within a crop until the box moves,
+ see landmarkBackends.py.
+"""
+
+import cv2  # pip install opencv-python
+import numpy as np  # pip install numpy
+
+from handLandmarks import X, Y, Z
+
+
+class FramePreprocessor:
+    # buffers must be more than the number of images that can be waiting for or in inference at once
+    # roi_inner_margin is how close, as a fraction of the box size, a hand may get to the crop box's edge
+    #  before the box is moved
+    def __init__(self, inference_width=640, hand_roi=False, roi_margin=0.5, full_frame_every=15, buffers=4,
+                 roi_inner_margin=0.1):
+        self.inference_width = inference_width
+        self.hand_roi = hand_roi
+        self.roi_margin = roi_margin
+        self.roi_inner_margin = roi_inner_margin
+        self.full_frame_every = full_frame_every
+
+        # Reused images, made on the first frame and remade if the frame size changes
+        self.buffer_count = buffers
+        self.buffers = []
+        self.next_buffer = 0
+        self.resized = None
+        self.frame_shape = None
+
+        # Full frame landmarks of the hands found last, None while no hand is tracked
+        self.tracked = None
+        self.frames_since_full = 0
+
+        # Pixel crop box in use and the frame size it is for, None while the whole frame is used
+        self.box = None
+        self.box_frame = None
+
+        # Counters
+        self.cropped_frames = 0
+        self.full_frames = 0
+
+    # Returns the RGB image for the backend and the crop used as (left, top, right, bottom) in
+    #  normalized frame coordinates, or None when it is the whole frame
+    def prepare(self, frame):
+        height, width = frame.shape[:2]
+        box = self.crop_box(width, height)
+
+        if box is None:
+            region = frame
+            crop = None
+            self.full_frames += 1
+            self.frames_since_full = 0
+        else:
+            x0, y0, x1, y1 = box
+            region = frame[y0:y1, x0:x1]
+            crop = (x0 / width, y0 / height, x1 / width, y1 / height)
+            self.cropped_frames += 1
+            self.frames_since_full += 1
+
+        # Without an inference width, or if the frame or crop is already small enough, only convert the colors.
+        # A small crop is not blown up, the model would only spend more time on the same pixels.
+        if self.inference_width is None or region.shape[1] <= self.inference_width:
+            return cv2.cvtColor(region, cv2.COLOR_BGR2RGB), crop
+
+        # Shrink first and then convert, so the conversion works on fewer pixels
+        self.make_buffers(width, height)
+        cv2.resize(region, (self.resized.shape[1], self.resized.shape[0]), dst=self.resized,
+                   interpolation=cv2.INTER_AREA)
+        image = self.buffers[self.next_buffer]
+        self.next_buffer = (self.next_buffer + 1) % len(self.buffers)
+        cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=image)
+        return image, crop
+
+    def make_buffers(self, width, height):
+        if self.frame_shape == (height, width):
+            return
+        self.frame_shape = (height, width)
+
+        # Same aspect ratio as the frame, crops are given the same aspect ratio too
+        inference_height = max(1, round(height * self.inference_width / width))
+        self.resized = np.empty((inference_height, self.inference_width, 3), dtype=np.uint8)
+        self.buffers = [np.empty_like(self.resized) for _ in range(self.buffer_count)]
+        self.next_buffer = 0
+
+    # Pixel box around the tracked hands, or None to use the whole frame
+    def crop_box(self, width, height):
+        tracked = self.tracked
+        if not self.hand_roi or tracked is None:
+            self.box = None
+            return None
+
+        # The box is kept through the whole frame used every few frames, so the crops after it are the same view
+        if self.frames_since_full + 1 >= self.full_frame_every:
+            return None
+
+        # Box around every tracked landmark, in pixels
+        points = np.concatenate(tracked)
+        x0, y0 = points[:, X].min() * width, points[:, Y].min() * height
+        x1, y1 = points[:, X].max() * width, points[:, Y].max() * height
+
+        # Keep the box in use while the hands are well inside it,
+        #  a side of the box on the edge of the frame cannot move any further anyway
+        box = self.box
+        if box is not None and self.box_frame == (width, height):
+            inset_x = (box[2] - box[0]) * self.roi_inner_margin
+            inset_y = (box[3] - box[1]) * self.roi_inner_margin
+            if ((x0 >= box[0] + inset_x or box[0] == 0) and (x1 <= box[2] - inset_x or box[2] >= width)
+                    and (y0 >= box[1] + inset_y or box[1] == 0) and (y1 <= box[3] - inset_y or box[3] >= height)):
+                return box
+
+        self.box = self.new_box(x0, y0, x1, y1, width, height)
+        self.box_frame = (width, height)
+        return self.box
+
+    # Box around the pixel bounds of the hands, grown by the margin, or None if it would cover the frame
+    def new_box(self, x0, y0, x1, y1, width, height):
+        # Grow it by the margin on every side and give it the frame's aspect ratio
+        box_width = (x1 - x0) * (1 + 2 * self.roi_margin)
+        box_height = (y1 - y0) * (1 + 2 * self.roi_margin)
+        box_width = max(box_width, box_height * width / height)
+        box_height = box_width * height / width
+
+        # Not worth cropping if the box covers the frame anyway
+        if box_width >= width or box_height >= height:
+            return None
+
+        # Keep the box inside the frame
+        left = min(max((x0 + x1 - box_width) / 2, 0), width - box_width)
+        top = min(max((y0 + y1 - box_height) / 2, 0), height - box_height)
+        return int(left), int(top), int(left + box_width), int(top + box_height)
+
+    # Map landmarks found in a crop back to full frame coordinates, in place
+    def restore(self, results, crop):
+        if crop is None:
+            return
+        left, top, right, bottom = crop
+
+        for landmarks in (results.left_hand_landmarks, results.right_hand_landmarks):
+            if landmarks is not None:
+                landmarks[:, X] = left + landmarks[:, X] * (right - left)
+                landmarks[:, Y] = top + landmarks[:, Y] * (bottom - top)
+
+                # Depth is on the same scale as x
+                landmarks[:, Z] *= right - left
+
+    # Remember where the hands are for the next frame's crop
+    def track(self, results):
+        hands = [landmarks for landmarks in (results.left_hand_landmarks, results.right_hand_landmarks)
+                 if landmarks is not None]
+        self.tracked = [landmarks.copy() for landmarks in hands] if hands else None
@@ -0,0 +1,61 @@
+"""
+Shows the camera frame with the hand landmarks drawn on it.
+
+The preview is only for watching, gesture detection never waits on it, so it can be cut down:
+ 'always' shows every frame, or at most max_fps frames per second if that is set,
+ 'hands' only shows frames with a hand in them,
+ 'off' never draws or touches any window, for machines where nobody watches the screen.
+"""
+
+import cv2  # pip install opencv-python
+
+from landmarkDrawing import draw_hand
+
+# Every preview mode
+PREVIEW_MODES = ('always', 'hands', 'off')
+
+
+class PreviewRenderer:
+    def __init__(self, mode='always', max_fps=None, window_name='Gesture Control Interface'):
+        if mode not in PREVIEW_MODES:
+            raise ValueError(f'preview mode must be one of {PREVIEW_MODES}, not {mode!r}')
+
+        self.mode = mode
+        self.min_interval = 1 / max_fps if max_fps else 0.0
+        self.window_name = window_name
+        self.window_open = False
+
+        self.last_shown = None
+        self.shown_frames = 0
+        self.skipped_frames = 0
+
+    # Show a frame if the mode and rate allow it, returns False if 'q' was pressed
+    def show(self, frame, results, now):
+        if self.mode == 'off':
+            return True
+
+        # Skip frames without hands, or frames that come too soon after the last one shown
+        hands_found = results.left_hand_landmarks is not None or results.right_hand_landmarks is not None
+        too_soon = self.last_shown is not None and now - self.last_shown < self.min_interval
+        if (self.mode == 'hands' and not hands_found) or too_soon:
+            self.skipped_frames += 1
+            return True
+
+        self.last_shown = now
+        self.shown_frames += 1
+
+        # Draw the hand landmarks
+        draw_hand(frame, results.right_hand_landmarks)
+        draw_hand(frame, results.left_hand_landmarks)
+
+        # Show the frame
+        cv2.imshow(self.window_name, frame)
+        self.window_open = True
+
+        # Stop if 'q' is pressed
+        return cv2.waitKey(1) != ord('q')
+
+    def close(self):
+        if self.window_open:
+            cv2.destroyAllWindows()
+            self.window_open = False